@@ -2,10 +2,15 @@
 # Copyright (c) 2025 Matthias Bilger <matthias@bilger.info>
 import argparse  # Added import for argparse
 import asyncio
+import json
 import logging
 import pathlib
+import platform
 import signal
 import threading
+from collections.abc import Callable
+from collections.abc import Coroutine
+from typing import Any
 
 import daiquiri
 from mutenix.config import load_config
@@ -74,6 +79,27 @@ def list_devices() -> None:
         print(device)
 
 
+def event_loop_factory() -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """Return uvloop's loop factory if it is available on this platform."""
+    if platform.system().lower() == "windows":
+        return None
+    try:
+        import uvloop  # type: ignore
+    except ImportError:
+        _logger.debug("uvloop not available, using default asyncio event loop")
+        return None
+    _logger.info("Using uvloop event loop")
+    return uvloop.new_event_loop
+
+
+def run_coroutine(
+    coro: Coroutine[Any, Any, Any],
+    loop_factory: Callable[[], asyncio.AbstractEventLoop] | None,
+) -> None:
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(coro)
+
+
 def setup_logging(logging_config: LoggingConfig) -> None:
     log_file_path = logging_config.file_path or pathlib.Path.cwd() / "mutenix.log"
     log_level = logging_config.level.to_logging_level()
@@ -121,12 +147,13 @@ def setup_logging(logging_config: LoggingConfig) -> None:
 @ensure_process_run_once()
 def main(args: argparse.Namespace) -> None:
     if args.config_schema:
-        print(Config.model_json_schema(indent=2))
+        print(json.dumps(Config.model_json_schema(), indent=2))
         return
 
     config = load_config(args.config)
 
     setup_logging(config.logging)
+    loop_factory = event_loop_factory()
 
     if args.list_devices:
         return list_devices()
@@ -137,11 +164,11 @@ def main(args: argparse.Namespace) -> None:
 
     if args.update_file:
         _logger.info("Starting manual update with file: %s", args.update_file)
-        asyncio.run(macropad.manual_update(args.update_file))
+        run_coroutine(macropad.manual_update(args.update_file), loop_factory)
         return
 
     def run_asyncio_loop():  # pragma: no cover
-        asyncio.run(macropad.process())
+        run_coroutine(macropad.process(), loop_factory)
 
     save_config(config)
 
@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger <matthias@bilger.info>
 import asyncio
+import functools
 import logging
 import shlex
 import subprocess
@@ -25,12 +26,18 @@ _logger = logging.getLogger(__name__)
 _session = requests.Session()
 
 
+@functools.cache
+def _controller(controller_type):
+    # creating a controller connects to the platform input APIs, do it once
+    return controller_type()
+
+
 def keyboard_action(action: Keyboard) -> None:
     if not Controller:
         _logger.error("pynput not supported, cannot send keypress")
         return
 
-    keyboard = Controller()
+    keyboard = _controller(Controller)
     if action.release:
         _logger.debug("Stop Pressing: %s", action.release.key)
         keyboard.release(action.release.key)
@@ -56,7 +63,7 @@ def mouse_action(action: Mouse) -> None:
     if not MouseController:
         _logger.error("pynput not supported, cannot send mousemove")
         return
-    mouse = MouseController()
+    mouse = _controller(MouseController)
     if action.move:
         _logger.debug("Move mouse to %s, %s", action.move.x, action.move.y)
         mouse.move(action.move.x, action.move.y)
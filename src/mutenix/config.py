@@ -1,28 +1,63 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger <matthias@bilger.info>
+import copy
+import functools
+import json
 import logging
 import os
+from collections import OrderedDict
 from pathlib import Path
 
 import pydantic
 import yaml
 from mutenix.models.config import Config
 
+try:
+    from yaml import CSafeDumper as SafeDumper
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeDumper  # type: ignore[assignment]
+    from yaml import SafeLoader  # type: ignore[assignment]
+
 _logger = logging.getLogger(__name__)
 
 CONFIG_FILENAME = "mutenix.yaml"
+CONFIG_CACHE_SIZE = 100
+CONFIG_SIDECAR_SUFFIX = ".cache.json"
 
+_config_cache: OrderedDict[str, tuple[int, int, dict]] = OrderedDict()
+_loaded_configs: dict[str, tuple[tuple[int, int], Config]] = {}
 
-def find_config_file() -> Path:
-    file_path = Path(CONFIG_FILENAME)
-    home_config_path = (
-        Path.home() / os.environ.get("XDG_CONFIG_HOME", ".config") / CONFIG_FILENAME
-    )
 
-    if not file_path.exists() and home_config_path.exists():
-        file_path = home_config_path
+def invalidate_config_cache() -> None:
+    """Forget all parsed and loaded configurations."""
+    _config_cache.clear()
+    _loaded_configs.clear()
+
+
+def _stat_config(file_path: Path) -> os.stat_result | None:
+    try:
+        return file_path.stat()
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _home_config_path() -> Path:
+    return Path.home() / os.environ.get("XDG_CONFIG_HOME", ".config") / CONFIG_FILENAME
+
 
-    return file_path
+def _locate_config_file() -> tuple[Path, os.stat_result | None]:
+    """Find the config file with a single stat per candidate and return both."""
+    for file_path in (Path(CONFIG_FILENAME), _home_config_path()):
+        stat = _stat_config(file_path)
+        if stat is not None:
+            return file_path, stat
+    return Path(CONFIG_FILENAME), None
+
+
+def find_config_file() -> Path:
+    return _locate_config_file()[0]
 
 
 def is_conversion_required(config_data: dict) -> bool:
@@ -50,14 +85,91 @@ def fallback_config(*, file_path: Path, fallback_type: str | None = None) -> Con
     return config
 
 
+def _config_sidecar_path(file_path: Path) -> Path:
+    return file_path.with_suffix(file_path.suffix + CONFIG_SIDECAR_SUFFIX)
+
+
+def _read_config_sidecar(file_path: Path, stat: os.stat_result) -> dict | None:
+    """Return the data stored for exactly this version of the yaml file, if any."""
+    try:
+        sidecar = json.loads(_config_sidecar_path(file_path).read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(sidecar, dict) or sidecar.get("source") != [
+        stat.st_mtime_ns,
+        stat.st_size,
+    ]:
+        return None
+    return sidecar.get("config")
+
+
+def _write_config_sidecar(
+    file_path: Path,
+    stat: os.stat_result,
+    config_data: dict,
+) -> None:
+    sidecar = {"source": [stat.st_mtime_ns, stat.st_size], "config": config_data}
+    try:
+        encoded = json.dumps(sidecar)
+    except (TypeError, ValueError):
+        return
+    if json.loads(encoded)["config"] != config_data:
+        # yaml only types (e.g. non-string keys) would not survive the round trip
+        return
+    try:
+        _config_sidecar_path(file_path).write_text(encoded)
+    except OSError as e:
+        _logger.debug("Could not write config cache: %s", e)
+
+
+def _read_config_data(
+    file_path: Path,
+    stat: os.stat_result | None,
+) -> dict | None:
+    """Parse the yaml file, reusing the last result while mtime and size match."""
+    key = str(file_path)
+    if stat is not None:
+        cached = _config_cache.get(key)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            _config_cache.move_to_end(key)
+            return copy.deepcopy(cached[2])
+
+    config_data = None
+    if stat is not None:
+        config_data = _read_config_sidecar(file_path, stat)
+    if config_data is None:
+        with open(file_path, "r") as file:
+            config_data = yaml.load(file, Loader=SafeLoader)
+        if stat is not None and config_data is not None:
+            _write_config_sidecar(file_path, stat, config_data)
+
+    if stat is not None and config_data is not None:
+        _config_cache[key] = (
+            stat.st_mtime_ns,
+            stat.st_size,
+            copy.deepcopy(config_data),
+        )
+        _config_cache.move_to_end(key)
+        if len(_config_cache) > CONFIG_CACHE_SIZE:
+            _config_cache.popitem(last=False)
+    return config_data
+
+
 def load_config(file_path: Path | None = None) -> Config:
     if file_path is None:
-        file_path = find_config_file()
+        file_path, stat = _locate_config_file()
+    else:
+        stat = _stat_config(file_path)
+    key = str(file_path.resolve())
+    if stat is not None:
+        cached = _loaded_configs.get(key)
+        if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            _logger.debug("Using already loaded config from file: %s", file_path)
+            return cached[1].model_copy(deep=True)
 
     try:
         _logger.info("Loading config from file: %s", file_path)
-        with open(file_path, "r") as file:
-            config_data = yaml.safe_load(file)
+        config_data = _read_config_data(file_path, stat)
         if config_data is None:
             raise yaml.YAMLError("No data in file")
     except FileNotFoundError:
@@ -72,7 +184,7 @@ def load_config(file_path: Path | None = None) -> Config:
         return fallback_config(file_path=file_path, fallback_type="yaml")
 
     try:
-        config = Config(**config_data)
+        config = Config.model_validate(config_data)
         config._internal_state = "file"
     except pydantic.ValidationError as e:
         _logger.warning("Configuration errors:")
@@ -90,6 +202,11 @@ def load_config(file_path: Path | None = None) -> Config:
     if is_conversion_required(config_data):
         return do_conversion(config_data, file_path)
 
+    if stat is not None:
+        _loaded_configs[key] = (
+            (stat.st_mtime_ns, stat.st_size),
+            config.model_copy(deep=True),
+        )
     return config
 
 
@@ -107,13 +224,27 @@ def save_config(config: Config, file_path: Path | str | None = None) -> None:
     try:
         _logger.warning("Saving file")
         file_path = Path(config._file_path)
+        invalidate_config_cache()
+        _config_sidecar_path(file_path).unlink(missing_ok=True)
+        config_data = config.model_dump(
+            mode="json",
+            exclude_none=True,
+            exclude_unset=True,
+        )
         with file_path.open("w") as file:
             yaml.dump(
-                config.model_dump(mode="json", exclude_none=True, exclude_unset=True),
+                config_data,
                 file,
+                Dumper=SafeDumper,
+                sort_keys=False,
+                width=4096,
             )
             file.write(
                 "\n# yaml-language-server: $schema=https://github.com/mutenix-org/software-host/raw/refs/heads/main/docs/mutenix.schema.json\n",
             )
+        # the dumped data is what parsing the new file yields, no need to parse it
+        stat = _stat_config(file_path)
+        if stat is not None:
+            _write_config_sidecar(file_path, stat, config_data)
     except (FileNotFoundError, yaml.YAMLError, IOError):
         _logger.error("Failed to write config to file: %s", file_path)
@@ -1,8 +1,13 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger <matthias@bilger.info>
 import asyncio
+import collections
+import concurrent.futures
 import logging
+import threading
+import weakref
 from typing import Callable
+from typing import TypeVar
 
 import hid
 from mutenix.models.config import DeviceInfo
@@ -18,12 +23,20 @@ from mutenix.utils import run_till_some_loop
 
 _logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class HidDevice:
     """Handles the HID connection to the device.
     Providing async read and write loops for incoming and outgoing messages.
     """
 
+    READ_POLL_INTERVAL = 0.005
+    """The device is opened in nonblocking mode, poll it in this interval when idle."""
+
+    PING_INTERVAL = 4.5
+    """Seconds between two pings sent to keep the device connection alive."""
+
     def __init__(
         self,
         state: HardwareState,
@@ -33,29 +46,43 @@ class HidDevice:
         self._device_info = device_identifications or []
         self._device: hid.device | None = None
         self._callbacks: list[Callable[[HidInputMessage], None]] = []
-        self._send_buffer: asyncio.Queue[tuple[HidCommand, asyncio.Future]] = (
-            asyncio.Queue()
+        self._send_deque: collections.deque[
+            tuple[HidCommand, asyncio.Future | None]
+        ] = collections.deque()
+        self._send_event = asyncio.Event()
+        self._io_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="mutenix-hid-write",
         )
+        # fallback for instances dropped without stop(), e.g. replaced after an update
+        self._finalizer = weakref.finalize(self, self._io_executor.shutdown, wait=False)
+        self._device_finalizer: weakref.finalize | None = None
+        # hidapi handles are not thread safe: the read loop, the write thread and
+        # device release all touch the handle under this lock
+        self._io_lock = threading.Lock()
+        # held by the writer per message, so exclusive device users can pause it
+        self._write_lock = asyncio.Lock()
         self._last_communication: float = 0
         self._last_ping_time: float = 0
         self._waiting_for_device: bool = False
         self._run: bool = True
 
-    def __del__(self):
-        if self._device:
-            self._device.close()
-
     @block_parallel
     async def _wait_for_device(self):
         _logger.info(
             "Looking for device with",
         )
-        self._device = None
+        await asyncio.to_thread(self._release_device)
         self._state.connection_status = ConnectionState.DISCONNECTED
-        self._device = await self._search_for_device_loop()
-        if self._device:
+        device = await self._search_for_device_loop()
+        if device:
+            self._attach_device(device)
             self._set_hardware_info()
 
+    def _attach_device(self, device: hid.device) -> None:
+        self._device = device
+        self._device_finalizer = weakref.finalize(self, device.close)
+
     def _set_hardware_info(self):
         if self._device:
             self._state.serial_number = self._device.get_serial_number_string()
@@ -129,11 +156,48 @@ class HidDevice:
             return None
 
     def _send_report(self, data: HidCommand):
-        buffer = bytes([data.REPORT_ID]) + data.to_buffer()
-        buffer = bytes(buffer)
-        if not self._device:
-            raise ValueError("Device not connected")
-        return self._device.write(buffer)
+        with self._io_lock:
+            if not self._device:
+                raise ValueError("Device not connected")
+            return self._device.write(data.to_report())
+
+    def _release_device(self) -> None:
+        with self._io_lock:
+            device, self._device = self._device, None
+        if self._device_finalizer:
+            self._device_finalizer.detach()
+            self._device_finalizer = None
+        if device:
+            device.close()
+
+    def _call_exclusive(self, func: Callable[[hid.device], T]) -> T:
+        with self._io_lock:
+            if not self._device:
+                raise ValueError("Device not connected")
+            return func(self._device)
+
+    async def run_exclusive(self, func: Callable[[hid.device], T]) -> T:
+        """
+        Runs a blocking function with exclusive access to the device.
+
+        Queued messages are held back and the read loop skips polling until
+        the function returns, e.g. for a firmware upgrade.
+
+        Args:
+            func (Callable): Called on the write thread with the raw device.
+
+        Returns:
+            The result of func.
+
+        Raises:
+            ValueError: If no device is connected.
+        """
+        async with self._write_lock:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._io_executor,
+                self._call_exclusive,
+                func,
+            )
 
     def send_msg(self, msg: HidCommand):
         """
@@ -145,11 +209,25 @@ class HidDevice:
         Returns:
             asyncio.Future: A future that will be set when the message is processed.
         """
-        future = asyncio.get_event_loop().create_future()
-        self._send_buffer.put_nowait((msg, future))
+        future = asyncio.get_running_loop().create_future()
+        self._send_deque.append((msg, future))
+        self._send_event.set()
         _logger.debug("Put message")
         return future
 
+    def send_msg_nowait(self, msg: HidCommand) -> None:
+        """
+        Queues a HID output message without tracking its result.
+
+        Use this for fire-and-forget messages such as LED updates, where no
+        caller waits for the write; it avoids allocating a future per message.
+
+        Args:
+            msg (HidCommand): The HID output message to be sent.
+        """
+        self._send_deque.append((msg, None))
+        self._send_event.set()
+
     def register_callback(self, callback: Callable[[HidInputMessage], None]) -> None:
         if callback not in self._callbacks:
             self._callbacks.append(callback)
@@ -174,9 +252,16 @@ class HidDevice:
             if not self._device:
                 await asyncio.sleep(0.1)  # pragma: no cover
                 return
-            buffer: bytes = self._device.read(64)
+            if not self._io_lock.acquire(blocking=False):
+                # a write or an exclusive user holds the device, poll again later
+                await asyncio.sleep(self.READ_POLL_INTERVAL)  # pragma: no cover
+                return
+            try:
+                buffer: bytes = self._device.read(64)
+            finally:
+                self._io_lock.release()
             if not buffer or len(buffer) == 0:
-                await asyncio.sleep(0.1)  # pragma: no cover
+                await asyncio.sleep(self.READ_POLL_INTERVAL)  # pragma: no cover
             else:
                 msg = HidInputMessage.from_buffer(buffer)
                 self._invoke_callbacks(msg)
@@ -189,44 +274,60 @@ class HidDevice:
 
     async def _write(self) -> None:
         try:
-            msg, future = await self._send_buffer.get()
-            _logger.debug("Sending message: %s", msg)
-            result = self._send_report(msg)
+            if not self._send_deque:
+                self._send_event.clear()
+                await self._send_event.wait()
+                if not self._send_deque:
+                    # woken up by stop
+                    return
+            async with self._write_lock:
+                if not self._send_deque:
+                    # drained by stop while paused
+                    return
+                msg, future = self._send_deque.popleft()
+                _logger.debug("Sending message: %s", msg)
+                # hid writes block, keep them off the event loop
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._io_executor,
+                    self._send_report,
+                    msg,
+                )
             if result < 0:
                 self._log_failed_to_send("Failed to send message: %s", msg)
-                future.set_exception(Exception("Failed to send message"))
+                if future is not None and not future.cancelled():
+                    future.set_exception(Exception("Failed to send message"))
                 return
-            self._last_communication = asyncio.get_event_loop().time()
-            if not future.cancelled():
+            self._last_communication = asyncio.get_running_loop().time()
+            if future is not None and not future.cancelled():
                 future.set_result(result)
-            self._send_buffer.task_done()
         except OSError as e:  # Device disconnected
             _logger.error("Device disconnected: %s", e)
-            future.set_exception(e)
+            if future is not None and not future.cancelled():
+                future.set_exception(e)
             await self._wait_for_device()
         except ValueError as e:
             _logger.error("Error sending message: %s", e)
-            future.set_exception(e)
+            if future is not None and not future.cancelled():
+                future.set_exception(e)
             await self._wait_for_device()
 
     async def _ping(self) -> None:
         """
         Sends a ping message to the HID device.
         """
+        loop = asyncio.get_running_loop()
         await asyncio.sleep(
-            self._last_ping_time + 4.5 - asyncio.get_event_loop().time(),
+            max(0.0, self._last_ping_time + self.PING_INTERVAL - loop.time()),
         )
-        if asyncio.get_event_loop().time() - self._last_ping_time > 4.5:
-            _logger.debug("Sending ping")
-            msg = Ping()
-            future = self.send_msg(msg)
-            try:
-                self._last_ping_time = asyncio.get_event_loop().time()
-                await future
-                _logger.debug("ping finally sent")
-            except Exception as e:
-                self._log_failed_to_send("Failed to send ping: %s", e)
-            self._last_ping_time = asyncio.get_event_loop().time()
+        _logger.debug("Sending ping")
+        future = self.send_msg(Ping())
+        try:
+            self._last_ping_time = loop.time()
+            await future
+            _logger.debug("ping finally sent")
+        except Exception as e:
+            self._log_failed_to_send("Failed to send ping: %s", e)
+        self._last_ping_time = loop.time()
 
     async def _process(self) -> None:  # pragma: no cover
         await self._wait_for_device()
@@ -235,8 +336,18 @@ class HidDevice:
     async def process(self) -> None:  # pragma: no cover
         await self._process_loop()
 
-    async def stop(self) -> None:  # pragma: no cover
+    async def stop(self) -> None:
+        """Stops the loops and releases the device and the write thread."""
         self._run = False
+        while self._send_deque:
+            _, future = self._send_deque.popleft()
+            if future is not None and not future.cancelled():
+                future.set_exception(RuntimeError("HidDevice is stopping"))
+        self._send_event.set()
+        self._finalizer.detach()
+        # let a write in flight finish before the device is closed under it
+        await asyncio.to_thread(self._io_executor.shutdown)
+        self._release_device()
 
     # create the run loops
     _read_loop = run_loop(_read)
@@ -1,6 +1,8 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger <matthias@bilger.info>
 import asyncio
+import functools
+import io
 import logging
 import shlex
 import subprocess
@@ -19,6 +21,7 @@ from mutenix.models.config import ButtonAction
 from mutenix.models.config import Config
 from mutenix.models.config import LedColor as ConfigLedColor
 from mutenix.models.config import LedStatus
+from mutenix.models.config import TeamsState
 from mutenix.models.hid_commands import LedColor
 from mutenix.models.hid_commands import SetLed
 from mutenix.models.hid_commands import Status
@@ -29,7 +32,9 @@ from mutenix.models.teams_messages import ClientMessage
 from mutenix.models.teams_messages import ClientMessageParameter
 from mutenix.models.teams_messages import MeetingAction
 from mutenix.models.teams_messages import ServerMessage
-from mutenix.updates import check_for_device_update
+from mutenix.updates import extract_update_files
+from mutenix.updates import fetch_device_update
+from mutenix.updates import perform_hid_upgrade
 from mutenix.updates import perform_upgrade_with_file
 from mutenix.utils import bring_teams_to_foreground
 from mutenix.utils import run_loop
@@ -40,13 +45,19 @@ from mutenix.websocket_client import TeamsWebSocketClient
 _logger = logging.getLogger(__name__)
 
 
+@functools.cache
+def _meeting_state_field(teams_state: TeamsState) -> str:
+    """Name of the MeetingState field reporting the given teams state."""
+    return teams_state.value.replace("-", "_").lower()
+
+
 class Macropad:
     """The main logic for the Macropad."""
 
     def __init__(self, config: Config):
         self._state = State()
         self._run = True
-        self._version_seen = None
+        self._version_seen: str | None = None
         self._last_status_check: defaultdict[int, float] = defaultdict(time.time)
         self._config = config
         self._last_led_update: dict[int, SetLed] = {}
@@ -112,25 +123,22 @@ class Macropad:
             if not action:
                 return
 
-            await asyncio.create_task(self._execute_actions(action.actions))
+            await self._execute_actions(action.actions)
 
     async def _execute_actions(self, actions: list[ActionDetails]) -> None:
         for single_action in actions:
             await self._execute_action(single_action)
 
     def _get_action(self, status) -> ButtonAction | None:
-        if not status.longpressed and status.button in self._tap_actions:
-            return self._tap_actions.get(status.button, None)
-        elif status.longpressed and status.button in self._longpress_actions:
-            return self._longpress_actions.get(status.button, None)
-        return None
+        actions = self._longpress_actions if status.longpressed else self._tap_actions
+        return actions.get(status.button)
 
     async def _execute_action(self, single_action: ActionDetails) -> None:
         if single_action.meeting_action:
             client_message = ClientMessage.create(
                 action=single_action.meeting_action,
             )
-            await self._teams_websocket.send_message(client_message)
+            self._teams_websocket.send_message_nowait(client_message)
         elif single_action.teams_reaction:
             client_message = ClientMessage.create(
                 action=MeetingAction.React,
@@ -138,9 +146,10 @@ class Macropad:
             client_message.parameters = ClientMessageParameter(
                 type_=single_action.teams_reaction.reaction,
             )
-            await self._teams_websocket.send_message(client_message)
+            self._teams_websocket.send_message_nowait(client_message)
         elif single_action.activate_teams:
-            bring_teams_to_foreground()
+            # activating the window runs external tools, keep the loop serving
+            await asyncio.to_thread(bring_teams_to_foreground)
         elif single_action.command:
             command_action(single_action.command)
         elif single_action.webhook:
@@ -157,12 +166,28 @@ class Macropad:
             _logger.info(version_info)
             self._version_seen = version_info.version
             if self._config.auto_update:
-                if check_for_device_update(
-                    self._device.raw,
+                # the release lookup and unpacking must not stall the loop, the
+                # upgrade needs the device to itself, queued writes wait behind it
+                update = await asyncio.to_thread(
+                    fetch_device_update,
                     version_info,
                     self._config.proxy,
-                ):
-                    self._setup_device()
+                )
+                if update:
+                    try:
+                        files = await asyncio.to_thread(
+                            extract_update_files,
+                            io.BytesIO(update),
+                        )
+                        await self._device.run_exclusive(
+                            lambda device: perform_hid_upgrade(device, files),
+                        )
+                    except Exception as e:
+                        _logger.error("Device update failed: %s", e)
+                        # retry with the next version report
+                        self._version_seen = None
+                    else:
+                        self._setup_device()
         else:
             _logger.debug(version_info)
         self._state.hardware.variant = version_info.type.name
@@ -197,7 +222,7 @@ class Macropad:
         )
         return True
 
-    async def _update_led(self, ledstatus: LedStatus) -> None:
+    async def _update_led(self, ledstatus: LedStatus, force=False) -> None:
         msg = self._current_state
         color: ConfigLedColor | None = ConfigLedColor.BLACK
         if ledstatus.teams_state:
@@ -212,12 +237,15 @@ class Macropad:
         if color is None:
             return
 
+        led_color = self._map_led_color(color)
+        last = self._last_led_update.get(ledstatus.button_id)
+        if not force and last is not None and last.color == led_color:
+            return
+
         await self._send_led_message(
             ledstatus.button_id,
-            SetLed(
-                ledstatus.button_id,
-                self._map_led_color(color),
-            ),
+            SetLed(ledstatus.button_id, led_color),
+            force,
         )
 
     def _get_teams_state_color(self, ledstatus, msg) -> ConfigLedColor:
@@ -229,7 +257,7 @@ class Macropad:
         ):
             mapped_state = getattr(
                 msg.meeting_update.meeting_state,
-                ledstatus.teams_state.teams_state.value.replace("-", "_").lower(),
+                _meeting_state_field(ledstatus.teams_state.teams_state),
             )
             return (
                 ledstatus.teams_state.color_on
@@ -299,10 +327,12 @@ class Macropad:
             ):
                 return
             _logger.debug(
-                f"Sending message: {message}, prev: {self._last_led_update.get(key, None)}",
+                "Sending message: %s, prev: %s",
+                message,
+                self._last_led_update.get(key, None),
             )
             if self._device.connected:
-                self._device.send_msg(message)
+                self._device.send_msg_nowait(message)
             await self._virtual_macropad.send_msg(message)
             self._last_led_update[key] = message
         except Exception as e:
@@ -310,7 +340,7 @@ class Macropad:
 
     async def _update_device_status(self, force=False) -> None:
         led_update_work = [
-            self._update_led(ledstatus) for ledstatus in self._config.leds
+            self._update_led(ledstatus, force) for ledstatus in self._config.leds
         ]
         await asyncio.gather(*led_update_work)
 
@@ -346,6 +376,9 @@ class Macropad:
             )
         except Exception as e:
             _logger.error("Error in Macropad process: %s", e)
+        finally:
+            # release the device and the connections however the loops ended
+            await self.stop()
 
     async def manual_update(self, update_file) -> None:
         """Manually update the device with a given file."""
@@ -354,7 +387,9 @@ class Macropad:
             perform_upgrade_with_file(self._device.raw, f)
 
     async def stop(self) -> None:
-        """Stops the device and WebSocket connection."""
+        """Stops the device and WebSocket connection, later calls do nothing."""
+        if not self._run:
+            return
         self._run = False
         await self._device.stop()
         _logger.info("Device stopped")
@@ -369,17 +404,17 @@ class Macropad:
     def activate_serial_console(self) -> None:
         message = UpdateConfig()
         message.activate_serial_console(True)
-        self._device.send_msg(message)
+        self._device.send_msg_nowait(message)
 
     def deactivate_serial_console(self) -> None:
         message = UpdateConfig()
         message.activate_serial_console(False)
-        self._device.send_msg(message)
+        self._device.send_msg_nowait(message)
 
     def activate_filesystem(self) -> None:
         message = UpdateConfig()
         message.activate_filesystem(True)
-        self._device.send_msg(message)
+        self._device.send_msg_nowait(message)
 
     @property
     def teams_connected(self) -> bool:  # pragma: no cover
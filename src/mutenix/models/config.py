@@ -38,14 +38,15 @@ class TeamsState(str, Enum):
 
 
 class AtLeastOneOption(ABC):
-    OPTION_FIELDS: ClassVar[list[str]] = []
+    OPTION_FIELDS: ClassVar[frozenset[str]] = frozenset()
 
     @pydantic.model_validator(mode="before")
     def at_least_one_option(cls, values):
         option_fields = cls.OPTION_FIELDS
-        if not any(values.get(field) for field in option_fields):
+        # the input usually holds a single option, so walk it instead of the fields
+        if not any(value and key in option_fields for key, value in values.items()):
             raise ValueError(
-                f"At least one of the following fields must be set: {', '.join(option_fields)}",
+                f"At least one of the following fields must be set: {', '.join(sorted(option_fields))}",
             )
         return values
 
@@ -102,7 +103,9 @@ class Keyboard(BaseModel, AtLeastOneOption):
         description="The key type action to be performed. This will type the string.",
     )
 
-    OPTION_FIELDS: ClassVar[list[str]] = ["press", "release", "tap", "type"]
+    OPTION_FIELDS: ClassVar[frozenset[str]] = frozenset(
+        {"press", "release", "tap", "type"},
+    )
 
 
 class MousePosition(BaseModel):
@@ -144,7 +147,9 @@ class Mouse(BaseModel, AtLeastOneOption):
         default=None,
         description="The mouse release action to be performed.",
     )
-    OPTION_FIELDS: ClassVar[list[str]] = ["move", "set", "click", "press", "release"]
+    OPTION_FIELDS: ClassVar[frozenset[str]] = frozenset(
+        {"move", "set", "click", "press", "release"},
+    )
 
 
 class DelayAction(BaseModel):
@@ -214,16 +219,18 @@ class ActionDetails(BaseModel, AtLeastOneOption):
         description="The delay in seconds to wait. Be carefully with this option.",
     )
 
-    OPTION_FIELDS: ClassVar[list[str]] = [
-        "webhook",
-        "keyboard",
-        "mouse",
-        "teams_reaction",
-        "meeting_action",
-        "activate_teams",
-        "command",
-        "delay",
-    ]
+    OPTION_FIELDS: ClassVar[frozenset[str]] = frozenset(
+        {
+            "webhook",
+            "keyboard",
+            "mouse",
+            "teams_reaction",
+            "meeting_action",
+            "activate_teams",
+            "command",
+            "delay",
+        },
+    )
 
 
 class ButtonAction(BaseModel):
@@ -345,13 +352,15 @@ class LedStatus(BaseModel, AtLeastOneOption):
         description="Flag to disable the LED.",
     )
 
-    OPTION_FIELDS: ClassVar[list[str]] = [
-        "teams_state",
-        "result_command",
-        "color_command",
-        "webhook",
-        "off",
-    ]
+    OPTION_FIELDS: ClassVar[frozenset[str]] = frozenset(
+        {
+            "teams_state",
+            "result_command",
+            "color_command",
+            "webhook",
+            "off",
+        },
+    )
 
 
 class VirtualMacropadConfig(BaseModel):
@@ -449,132 +458,151 @@ class LoggingConfig(BaseModel):
 
 def _default_actions():
     return [
-        ButtonAction(
+        ButtonAction.model_construct(
             button_id=1,
-            actions=[ActionDetails(meeting_action=MeetingAction.ToggleMute)],
+            actions=[
+                ActionDetails.model_construct(meeting_action=MeetingAction.ToggleMute),
+            ],
         ),
-        ButtonAction(
+        ButtonAction.model_construct(
             button_id=2,
-            actions=[ActionDetails(meeting_action=MeetingAction.ToggleHand)],
+            actions=[
+                ActionDetails.model_construct(meeting_action=MeetingAction.ToggleHand),
+            ],
         ),
-        ButtonAction(
+        ButtonAction.model_construct(
             button_id=3,
-            actions=[ActionDetails(activate_teams=True)],
+            actions=[ActionDetails.model_construct(activate_teams=True)],
         ),
-        ButtonAction(
+        ButtonAction.model_construct(
             button_id=4,
             actions=[
-                ActionDetails(
-                    teams_reaction=TeamsReact(
+                ActionDetails.model_construct(
+                    teams_reaction=TeamsReact.model_construct(
                         reaction=ClientMessageParameterType.ReactLike,
                     ),
                 ),
             ],
         ),
-        ButtonAction(
+        ButtonAction.model_construct(
             button_id=5,
-            actions=[ActionDetails(meeting_action=MeetingAction.LeaveCall)],
+            actions=[
+                ActionDetails.model_construct(meeting_action=MeetingAction.LeaveCall),
+            ],
         ),
-        ButtonAction(
+        ButtonAction.model_construct(
             button_id=6,
-            actions=[ActionDetails(meeting_action=MeetingAction.ToggleMute)],
+            actions=[
+                ActionDetails.model_construct(meeting_action=MeetingAction.ToggleMute),
+            ],
         ),
-        ButtonAction(
+        ButtonAction.model_construct(
             button_id=7,
-            actions=[ActionDetails(meeting_action=MeetingAction.ToggleHand)],
+            actions=[
+                ActionDetails.model_construct(meeting_action=MeetingAction.ToggleHand),
+            ],
+        ),
+        ButtonAction.model_construct(
+            button_id=8,
+            actions=[ActionDetails.model_construct(activate_teams=True)],
         ),
-        ButtonAction(button_id=8, actions=[ActionDetails(activate_teams=True)]),
-        ButtonAction(
+        ButtonAction.model_construct(
             button_id=9,
             actions=[
-                ActionDetails(
-                    teams_reaction=TeamsReact(
+                ActionDetails.model_construct(
+                    teams_reaction=TeamsReact.model_construct(
                         reaction=ClientMessageParameterType.ReactLike,
                     ),
                 ),
             ],
         ),
-        ButtonAction(
+        ButtonAction.model_construct(
             button_id=10,
-            actions=[ActionDetails(meeting_action=MeetingAction.LeaveCall)],
+            actions=[
+                ActionDetails.model_construct(meeting_action=MeetingAction.LeaveCall),
+            ],
         ),
     ]
 
 
 def _default_longpress():
     return [
-        ButtonAction(
+        ButtonAction.model_construct(
             button_id=3,
-            actions=[ActionDetails(meeting_action=MeetingAction.ToggleVideo)],
+            actions=[
+                ActionDetails.model_construct(meeting_action=MeetingAction.ToggleVideo),
+            ],
         ),
-        ButtonAction(
+        ButtonAction.model_construct(
             button_id=8,
-            actions=[ActionDetails(meeting_action=MeetingAction.ToggleVideo)],
+            actions=[
+                ActionDetails.model_construct(meeting_action=MeetingAction.ToggleVideo),
+            ],
         ),
     ]
 
 
 def _default_leds():
     return [
-        LedStatus(
+        LedStatus.model_construct(
             button_id=1,
-            teams_state=LedStatusTeamsState(
+            teams_state=LedStatusTeamsState.model_construct(
                 teams_state=TeamsState.MUTED,
                 color_off=LedColor.RED,
                 color_on=LedColor.GREEN,
             ),
         ),
-        LedStatus(
+        LedStatus.model_construct(
             button_id=2,
-            teams_state=LedStatusTeamsState(
+            teams_state=LedStatusTeamsState.model_construct(
                 teams_state=TeamsState.HAND_RAISED,
                 color_on=LedColor.YELLOW,
                 color_off=LedColor.BLACK,
             ),
         ),
-        LedStatus(
+        LedStatus.model_construct(
             button_id=3,
-            teams_state=LedStatusTeamsState(
+            teams_state=LedStatusTeamsState.model_construct(
                 teams_state=TeamsState.VIDEO_ON,
                 color_on=LedColor.GREEN,
                 color_off=LedColor.RED,
             ),
         ),
-        LedStatus(
+        LedStatus.model_construct(
             button_id=5,
-            teams_state=LedStatusTeamsState(
+            teams_state=LedStatusTeamsState.model_construct(
                 teams_state=TeamsState.IN_MEETING,
                 color_on=LedColor.GREEN,
                 color_off=LedColor.BLACK,
             ),
         ),
-        LedStatus(
+        LedStatus.model_construct(
             button_id=6,
-            teams_state=LedStatusTeamsState(
+            teams_state=LedStatusTeamsState.model_construct(
                 teams_state=TeamsState.MUTED,
                 color_on=LedColor.RED,
                 color_off=LedColor.GREEN,
             ),
         ),
-        LedStatus(
+        LedStatus.model_construct(
             button_id=7,
-            teams_state=LedStatusTeamsState(
+            teams_state=LedStatusTeamsState.model_construct(
                 teams_state=TeamsState.HAND_RAISED,
                 color_on=LedColor.YELLOW,
                 color_off=LedColor.BLACK,
             ),
         ),
-        LedStatus(
+        LedStatus.model_construct(
             button_id=8,
-            teams_state=LedStatusTeamsState(
+            teams_state=LedStatusTeamsState.model_construct(
                 teams_state=TeamsState.VIDEO_ON,
                 color_on=LedColor.RED,
                 color_off=LedColor.GREEN,
             ),
         ),
-        LedStatus(
+        LedStatus.model_construct(
             button_id=10,
-            teams_state=LedStatusTeamsState(
+            teams_state=LedStatusTeamsState.model_construct(
                 teams_state=TeamsState.IN_MEETING,
                 color_on=LedColor.GREEN,
                 color_off=LedColor.BLACK,
@@ -583,6 +611,30 @@ def _default_leds():
     ]
 
 
+def _check_unique_button_ids(items: list[ButtonAction] | list[LedStatus]) -> None:
+    seen: set[int] = set()
+    for item in items:
+        if item.button_id in seen:
+            raise ValueError("All button_ids must be unique.")
+        seen.add(item.button_id)
+
+
+def _default_device_identifications():
+    return [
+        DeviceInfo.model_construct(
+            vendor_id=0x1D50,
+            product_id=0x6189,
+            serial_number=None,
+        ),
+        DeviceInfo.model_construct(
+            vendor_id=7504,
+            product_id=24774,
+            serial_number=None,
+        ),
+        DeviceInfo.model_construct(vendor_id=4617, product_id=1, serial_number=None),
+    ]
+
+
 class Config(BaseModel):
     """
     Mutenix configuration parameters for actions, leds keypad and more.
@@ -601,22 +653,18 @@ class Config(BaseModel):
     )
     leds: list[LedStatus] = Field(default_factory=_default_leds)
     teams_token: str | None = None
-    virtual_keypad: VirtualMacropadConfig = VirtualMacropadConfig()
+    virtual_keypad: VirtualMacropadConfig = Field(
+        default_factory=VirtualMacropadConfig.model_construct,
+    )
     auto_update: bool = True
-    device_identifications: list[DeviceInfo] = [
-        DeviceInfo(vendor_id=0x1D50, product_id=0x6189, serial_number=None),
-        DeviceInfo(vendor_id=7504, product_id=24774, serial_number=None),
-        DeviceInfo(vendor_id=4617, product_id=1, serial_number=None),
-    ]
-    logging: LoggingConfig = LoggingConfig()
+    device_identifications: list[DeviceInfo] = Field(
+        default_factory=_default_device_identifications,
+    )
+    logging: LoggingConfig = Field(default_factory=LoggingConfig.model_construct)
     proxy: str | None = None
 
     @pydantic.model_validator(mode="after")
     def validate_unique_button_ids(cls, values):
-        button_ids = [action.button_id for action in values.actions]
-        if len(button_ids) != len(set(button_ids)):
-            raise ValueError("All button_ids must be unique.")
-        button_ids = [led.button_id for led in values.leds]
-        if len(button_ids) != len(set(button_ids)):
-            raise ValueError("All button_ids must be unique.")
+        _check_unique_button_ids(values.actions)
+        _check_unique_button_ids(values.leds)
         return values
@@ -151,14 +151,19 @@ class WebhookAction(BaseModel):
     )
 
 
+_KEY_FIELDS = frozenset(("key", "modifiers", "string"))
+_MOUSE_FIELDS = frozenset(("x", "y", "button"))
+
+
 def button_action_details_descriminator(v: Any) -> str:
     if isinstance(v, str):
         return "cmd"
     if not isinstance(v, dict):
         return ""
-    if "key" in v or "modifiers" in v or "string" in v:
+    keys = v.keys()
+    if not _KEY_FIELDS.isdisjoint(keys):
         return "key"
-    if "x" in v or "y" in v or "button" in v:
+    if not _MOUSE_FIELDS.isdisjoint(keys):
         return "mouse"
     if "url" in v:
         return "webhook"
@@ -178,11 +183,14 @@ SequenceElementType = Annotated[
 SequenceType = list[SequenceElementType]
 
 
+_REACT_VALUES = frozenset(e.value for e in ClientMessageParameterType)
+
+
 def button_action_discriminator(v: Any) -> str:
     if v is None:
         return "none"
     if isinstance(v, str):
-        if str(v).lower() in [e.value for e in ClientMessageParameterType]:
+        if v.lower() in _REACT_VALUES:
             return "react"
     if isinstance(v, (list)):
         return "sequence"
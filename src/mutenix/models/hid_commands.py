@@ -1,7 +1,10 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger <matthias@bilger.info>
+import functools
+import struct
 from abc import ABC
 from abc import abstractmethod
+from collections.abc import Callable
 from enum import IntEnum
 from enum import ReprEnum
 from typing import override
@@ -37,30 +40,35 @@ class HidOutCommands(IntEnum):
 
 
 class HidInputMessage:
+    __slots__ = ()
     MESSAGE_LENGTH = 8
 
     @staticmethod
     def from_buffer(buffer: bytes):
-        match buffer[1]:
-            case HidInCommands.VERSION_INFO:
-                return VersionInfo(buffer[2:8])
-            case HidInCommands.STATUS:
-                return Status(buffer[2:8])
-            case HidInCommands.STATUS_REQUEST.value:
-                return StatusRequest()
-        raise NotImplementedError
+        message_type = _HID_IN_DISPATCH.get(buffer[1])
+        if message_type is None:
+            raise NotImplementedError
+        return message_type(buffer[2:8])
 
     def __repr__(self):  # pragma: no cover
         return self.__str__()
 
 
 class Status(HidInputMessage):
+    __slots__ = ("buffer", "button", "triggered", "longpressed", "pressed", "released")
+
     @classmethod
     def trigger_button(cls, button: int):
         return cls(bytes([button, 1, 0, 0, 1]))
 
     def __init__(self, buffer: bytes):
         self.buffer = buffer
+        # decode all fields once, the status is read multiple times per report
+        self.button: int = buffer[0]
+        self.triggered: bool = buffer[1] != 0
+        self.longpressed: bool = buffer[2] != 0
+        self.pressed: bool = buffer[3] != 0
+        self.released: bool = buffer[4] != 0
 
     def __str__(self):
         return (
@@ -69,48 +77,46 @@ class Status(HidInputMessage):
             f"released: {self.released} }}"
         )
 
-    @property
-    def button(self):
-        return self.buffer[0]
-
-    @property
-    def triggered(self) -> bool:
-        return self.buffer[1] != 0
-
-    @property
-    def longpressed(self) -> bool:
-        return self.buffer[2] != 0
-
-    @property
-    def pressed(self) -> bool:
-        return self.buffer[3] != 0
-
-    @property
-    def released(self) -> bool:
-        return self.buffer[4] != 0
-
 
 class VersionInfo(HidInputMessage):
+    __slots__ = ("buffer", "version", "type")
+
     def __init__(self, buffer: bytes):
         self.buffer = buffer
+        self.version: str = f"{buffer[0]}.{buffer[1]}.{buffer[2]}"
+        # boards newer than this release must not drop the whole report
+        self.type: HardwareTypes = (
+            HardwareTypes(buffer[3])
+            if buffer[3] in HardwareTypes._value2member_map_
+            else HardwareTypes.UNKNOWN
+        )
 
     def __str__(self):
         return f"Version Info: {self.version}, type {self.type.name}"
 
-    @property
-    def version(self):
-        return f"{self.buffer[0]}.{self.buffer[1]}.{self.buffer[2]}"
 
-    @property
-    def type(self):
-        return HardwareTypes(self.buffer[3])
+class StatusRequest(HidInputMessage):
+    __slots__ = ()
 
+    def __init__(self, buffer: bytes = b""):
+        pass
 
-class StatusRequest(HidInputMessage):
     def __str__(self):  # pragma: no cover
         return "Status Request"
 
 
+_HID_IN_DISPATCH: dict[int, Callable[[bytes], HidInputMessage]] = {
+    HidInCommands.VERSION_INFO.value: VersionInfo,
+    HidInCommands.STATUS.value: Status,
+    HidInCommands.STATUS_REQUEST.value: StatusRequest,
+}
+"""Maps the identifier of an incoming HID report to the message type decoding it."""
+
+
+_HID_REPORT = struct.Struct("9B")
+"""Layout of an output report: report id, command, six data bytes and the counter."""
+
+
 class HidOutputMessage:
     REPORT_ID = 1
     pass
@@ -128,6 +134,10 @@ class HidCommand(HidOutputMessage, ABC):
     def to_buffer(self) -> bytes:  # pragma: no cover
         raise NotImplementedError
 
+    def to_report(self) -> bytes:
+        """The complete report as written to the device, prefixed by the report id."""
+        return bytes((self.REPORT_ID,)) + self.to_buffer()
+
 
 class LedColor(tuple, ReprEnum):
     # The colors are encoded Red, Green, Blue, White
@@ -143,27 +153,44 @@ class LedColor(tuple, ReprEnum):
     PURPLE = (0x09, 0x00, 0x09, 0x00)
 
 
+_COUNTER_BYTES = tuple(bytes((i,)) for i in range(256))
+"""Single byte encodings of the message counter, appended to prebuilt reports."""
+
+
+@functools.lru_cache(maxsize=None)
+def _set_led_prefix(id: int, led_color: LedColor) -> bytes:
+    """The SetLed report, including the report id, without its counter byte."""
+    color = led_color.value
+    return bytes(
+        (
+            SetLed.REPORT_ID,
+            HidOutCommands.SET_LED,
+            id,
+            color[0],
+            color[1],
+            color[2],
+            color[3],
+            0,
+        ),
+    )
+
+
 class SetLed(HidCommand):
     def __init__(self, id, led_color: LedColor):
         super().__init__()
         self.id = id
         self.color = led_color
+        self._report = (
+            _set_led_prefix(id, led_color) + _COUNTER_BYTES[self._current_counter]
+        )
 
     @override
     def to_buffer(self) -> bytes:
-        color = self.color.value
-        return bytes(
-            [
-                HidOutCommands.SET_LED,
-                self.id,
-                color[0],
-                color[1],
-                color[2],
-                color[3],
-                0,
-                self._current_counter,
-            ],
-        )
+        return self._report[1:]
+
+    @override
+    def to_report(self) -> bytes:
+        return self._report
 
     def __eq__(self, other):
         return self.id == other.id and self.color == other.color
@@ -186,17 +213,20 @@ class UpdateConfig(HidCommand):
 
     @override
     def to_buffer(self) -> bytes:
-        return bytes(
-            [
-                HidOutCommands.UPDATE_CONFIG,
-                self._activate_debug,
-                self._activate_filesystem,
-                0,
-                0,
-                0,
-                0,
-                self._current_counter,
-            ],
+        return self.to_report()[1:]
+
+    @override
+    def to_report(self) -> bytes:
+        return _HID_REPORT.pack(
+            self.REPORT_ID,
+            HidOutCommands.UPDATE_CONFIG,
+            self._activate_debug,
+            self._activate_filesystem,
+            0,
+            0,
+            0,
+            0,
+            self._current_counter,
         )
 
     def __str__(self):
@@ -207,10 +237,25 @@ class SimpleHidCommand(HidCommand):
     def __init__(self, command: HidOutCommands):
         super().__init__()
         self.command = command
+        self._report = _HID_REPORT.pack(
+            self.REPORT_ID,
+            command,
+            0,
+            0,
+            0,
+            0,
+            0,
+            0,
+            self._current_counter,
+        )
 
     @override
     def to_buffer(self) -> bytes:
-        return bytes([int(self.command), 0, 0, 0, 0, 0, 0, self._current_counter])
+        return self._report[1:]
+
+    @override
+    def to_report(self) -> bytes:
+        return self._report
 
     def __str__(self):  # pragma: no cover
         return f"{self.command.name}"
@@ -1,5 +1,9 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger <matthias@bilger.info>
+import functools
+import itertools
+import json
+from collections.abc import Iterator
 from enum import Enum
 from typing import ClassVar
 from typing import Optional
@@ -100,11 +104,44 @@ class ClientMessage(BaseModel):
     parameters: Optional[ClientMessageParameter] = None
     request_id: int = Field(None, serialization_alias="requestId")
 
-    _request_id_counter: ClassVar[int] = 0
+    _request_id_counter: ClassVar[Iterator[int]] = itertools.count(1)
     """Each message must have a unique request_id. The counter is incremented for each message automatically."""
 
     @classmethod
-    def create(cls, *args, **kwargs) -> "ClientMessage":
-        cls._request_id_counter += 1
-        kwargs["request_id"] = cls._request_id_counter
-        return cls(*args, **kwargs)
+    def create(cls, **kwargs) -> "ClientMessage":
+        """Creates a message with the next request_id.
+
+        The values are built internally from the already validated configuration,
+        so the message is constructed without running validation again."""
+        kwargs["request_id"] = next(cls._request_id_counter)
+        kwargs.setdefault("parameters", None)
+        return cls.model_construct(**kwargs)
+
+    def to_json(self) -> str:
+        """Serializes the message like `model_dump_json(by_alias=True)`.
+
+        Only the request_id changes between messages of the same action, so the
+        rest of the body is serialized once per action and parameter."""
+        parameter_type = self.parameters.type_ if self.parameters else None
+        return (
+            _client_message_prefix(self.action, parameter_type)
+            + json.dumps(self.request_id)
+            + "}"
+        )
+
+
+@functools.lru_cache(maxsize=64)
+def _client_message_prefix(
+    action: MeetingAction,
+    parameter_type: ClientMessageParameterType | None,
+) -> str:
+    parameters = (
+        ClientMessageParameter(type_=parameter_type)
+        if parameter_type is not None
+        else None
+    )
+    body = ClientMessage.model_construct(
+        action=action,
+        parameters=parameters,
+    ).model_dump_json(by_alias=True, exclude={"request_id"})
+    return body[:-1] + ',"requestId":'
@@ -4,14 +4,21 @@ let ws;
 function requestState() {
     //ws.send(JSON.stringify({ command: "state_request"}));
 }
-function onMessage(event) {
-    const data = JSON.parse(event.data);
+function setIndicator(data) {
     if (data.button){
         const indicators = document.getElementsByClassName('indicator' + data.button);
         for (let i = 0; i < indicators.length; i++) {
             indicators[i].style.backgroundColor = data.color;
         }
     }
+}
+function onMessage(event) {
+    const data = JSON.parse(event.data);
+    if (Array.isArray(data)) {
+        data.forEach(setIndicator);
+    } else {
+        setIndicator(data);
+    }
 };
 function sendButtonPress(button) {
     if (ws.readyState == WebSocket.OPEN) {
@@ -1,60 +1,241 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger <matthias@bilger.info>
+import functools
 import io
+import json
 import logging
+import os
+import time
 import webbrowser
+from pathlib import Path
+from typing import Any
+from typing import BinaryIO
 
 import hid
 import requests
 import semver
 from mutenix.models.hid_commands import VersionInfo
-from mutenix.updates.device_update import perform_upgrade_with_file
 
 _logger = logging.getLogger(__name__)
+_session = requests.Session()
 
+RELEASE_CACHE_FILENAME = "mutenix-release.json"
+DEVICE_RELEASE_URL = (
+    "https://api.github.com/repos/mutenix-org/firmware-macroboard/releases/latest"
+)
+HOST_RELEASE_URL = (
+    "https://api.github.com/repos/mutenix-org/software-host/releases/latest"
+)
+DOWNLOAD_ATTEMPTS = 3
+DOWNLOAD_BACKOFF = 1.0
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
-def check_for_device_update(
-    device: hid.device,
+
+def perform_upgrade_with_file(device: hid.device, file_stream: BinaryIO) -> None:
+    # the firmware transfer pulls in tarfile, python_minifier and tqdm,
+    # only load it once an update is actually performed
+    from mutenix.updates.device_update import perform_upgrade_with_file as upgrade
+
+    upgrade(device, file_stream)
+
+
+def extract_update_files(file_stream: BinaryIO) -> list[tuple[str, bytes]]:
+    """Unpack the firmware files from an update archive.
+
+    Decompression does not touch the device, so it can run in a worker thread.
+    """
+    from mutenix.updates.device_update import extract_update_files as extract
+
+    return extract(file_stream)
+
+
+def perform_hid_upgrade(device: hid.device, files: list[tuple[str, bytes]]) -> None:
+    from mutenix.updates.device_update import perform_hid_upgrade as upgrade
+
+    upgrade(device, files)
+
+
+def _release_cache_file() -> Path:
+    return (
+        Path.home()
+        / os.environ.get("XDG_CACHE_HOME", ".cache")
+        / RELEASE_CACHE_FILENAME
+    )
+
+
+def _load_release_cache() -> dict[str, Any]:
+    try:
+        with open(_release_cache_file(), "r") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _store_release_cache(cache: dict[str, Any]) -> None:
+    cache_file = _release_cache_file()
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, "w") as f:
+            json.dump(cache, f)
+    except OSError as e:
+        _logger.debug("Could not store release cache: %s", e)
+
+
+def _fetch_latest_release(url: str, proxies: dict[str, str]) -> dict | None:
+    """Fetch the latest release info, reusing the cached copy if unchanged.
+
+    The ETag of the last answer is sent along, GitHub answers with 304 and no
+    body as long as there was no new release.
+    """
+    cache = _load_release_cache()
+    entry = cache.get(url)
+    cached: dict[str, Any] = entry if isinstance(entry, dict) else {}
+    headers = {}
+    if {"etag", "release"} <= cached.keys():
+        headers["If-None-Match"] = cached["etag"]
+    result = _session.get(url, timeout=4, proxies=proxies, headers=headers)
+    if result.status_code == 304 and headers:
+        _logger.debug("Release info for %s unchanged", url)
+        return cached["release"]
+    if result.status_code != 200:
+        _logger.error(
+            "Failed to fetch latest release info, status code: %s",
+            result.status_code,
+        )
+        return None
+
+    release = result.json()
+    if "ETag" in result.headers:
+        cache[url] = {"etag": result.headers["ETag"], "release": release}
+        _store_release_cache(cache)
+    return release
+
+
+def _expected_size(result: requests.Response) -> int | None:
+    """Total size of the file announced by a response, None if unknown."""
+    if result.headers.get("Content-Encoding"):
+        # the body is decoded while streaming, the announced length does not match
+        return None
+    if result.status_code == 206:
+        _, _, total = result.headers.get("Content-Range", "").rpartition("/")
+    else:
+        total = result.headers.get("Content-Length", "")
+    return int(total) if total.isdigit() else None
+
+
+def _download_archive(url: str, proxies: dict[str, str]) -> bytes:
+    """Download an update archive, retrying and resuming if the connection drops.
+
+    Every failed attempt is retried up to ``DOWNLOAD_ATTEMPTS`` times with an
+    exponential backoff. Retries continue with a Range request from the bytes
+    already received if the server announced ``Accept-Ranges``; otherwise, or if
+    the server answers with the full file, the download starts over. A partial
+    answer must start exactly where the data ends, else the download starts over
+    as well. A body shorter than the announced size counts as a failed attempt.
+    """
+    data = bytearray()
+    resumable = False
+    attempt = 1
+    while True:
+        offset = len(data) if resumable else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            result = _session.get(
+                url,
+                headers=headers,
+                proxies=proxies,
+                stream=True,
+                timeout=10,
+            )
+            try:
+                result.raise_for_status()
+                if result.status_code == 206:
+                    content_range = result.headers.get("Content-Range", "")
+                    if not offset or not content_range.startswith(f"bytes {offset}-"):
+                        data.clear()
+                        resumable = False
+                        raise requests.RequestException(
+                            f"Unexpected Content-Range {content_range!r}",
+                        )
+                else:
+                    data.clear()
+                    resumable = result.headers.get("Accept-Ranges") == "bytes"
+                expected = _expected_size(result)
+                for chunk in result.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    data += chunk
+            finally:
+                result.close()
+            if expected is not None and len(data) != expected:
+                raise requests.RequestException(
+                    f"Received {len(data)} of {expected} bytes",
+                )
+            return bytes(data)
+        except requests.RequestException as e:
+            if attempt >= DOWNLOAD_ATTEMPTS:
+                raise
+            delay = DOWNLOAD_BACKOFF * 2 ** (attempt - 1)
+            attempt += 1
+            _logger.warning(
+                "Download failed after %d bytes, retrying in %.0fs: %s",
+                len(data),
+                delay,
+                e,
+            )
+            time.sleep(delay)
+
+
+@functools.lru_cache(maxsize=16)
+def _parse_version(version: str) -> semver.Version:
+    return semver.Version.parse(version)
+
+
+def fetch_device_update(
     device_version: VersionInfo,
     proxy: str | None = None,
-):
+) -> bytes | None:
+    """Download the latest firmware archive if it is newer than the device.
+
+    This only does network I/O, so it can run in a worker thread while the
+    device keeps being served.
+    """
     if proxy:
         proxies = {"https": proxy}
     else:
         proxies = {}
     try:
-        result = requests.get(
-            "https://api.github.com/repos/mutenix-org/firmware-macroboard/releases/latest",
-            timeout=4,
-            proxies=proxies,
-        )
-        if result.status_code != 200:
-            _logger.error(
-                "Failed to fetch latest release info, status code: %s",
-                result.status_code,
-            )
-            return False
+        releases = _fetch_latest_release(DEVICE_RELEASE_URL, proxies)
+        if releases is None:
+            return None
 
-        releases = result.json()
         latest_version = releases.get("tag_name", "v0.0.0")[1:]
         _logger.debug("Latest version: %s", latest_version)
-        online_version = semver.Version.parse(latest_version)
-        local_version = semver.Version.parse(device_version.version)
-        if online_version.compare(local_version) <= 0:
+        online_version = _parse_version(latest_version)
+        local_version = _parse_version(device_version.version)
+        if online_version <= local_version:
             _logger.info("Device is up to date")
-            return False
+            return None
 
-        print("Device update available, starting update, please be patient")
+        _logger.info("Device update available, starting update, please be patient")
         assets = releases.get("assets", [])
         for asset in assets:
             if asset.get("name") == f"v{latest_version}.tar.gz":
-                update_url = asset.get("browser_download_url")
-                result = requests.get(update_url)
-                result.raise_for_status()
-                perform_upgrade_with_file(device, io.BytesIO(result.content))
-                return True
+                return _download_archive(asset.get("browser_download_url"), proxies)
     except requests.RequestException as e:
         _logger.error("Failed to check for device update availability %s", e)
+    return None
+
+
+def check_for_device_update(
+    device: hid.device,
+    device_version: VersionInfo,
+    proxy: str | None = None,
+):
+    update = fetch_device_update(device_version, proxy)
+    if not update:
+        return False
+    perform_upgrade_with_file(device, io.BytesIO(update))
+    return True
 
 
 # region: Update Application
@@ -64,29 +245,22 @@ def check_for_self_update(major: int, minor: int, patch: int, proxy: str | None
     else:
         proxies = {}
     try:
-        result = requests.get(
-            "https://api.github.com/repos/mutenix-org/software-host/releases/latest",
-            timeout=4,
-            proxies=proxies,
-        )
-        if result.status_code != 200:
-            _logger.error(
-                "Failed to fetch latest release info, status code: %s",
-                result.status_code,
-            )
+        releases = _fetch_latest_release(HOST_RELEASE_URL, proxies)
+        if releases is None:
             return
 
-        releases = result.json()
         latest_version = releases.get("tag_name", "v0.0.0")[1:]
         _logger.debug("Latest version: %s", latest_version)
-        online_version = semver.Version.parse(latest_version)
+        online_version = _parse_version(latest_version)
         local_version = semver.Version(major=major, minor=minor, patch=patch)
-        if online_version.compare(local_version) <= 0:
+        if online_version <= local_version:
             _logger.info("Host Software is up to date")
             return
 
         _logger.info("Application update available, but auto update is disabled")
-        webbrowser.open(releases.get("html_url"))
+        html_url = releases.get("html_url")
+        if isinstance(html_url, str):
+            webbrowser.open(html_url)
     except requests.RequestException as e:
         _logger.error("Failed to check for application update availability: %s", e)
 
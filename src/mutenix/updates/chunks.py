@@ -1,9 +1,12 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger matthias@bilger.info
+import struct
 from enum import IntEnum
 
 from mutenix.updates.constants import MAX_CHUNK_SIZE
 
+_HEADER = struct.Struct("<HHHH")
+
 
 class ChunkType(IntEnum):
     FILE_START = 1
@@ -20,21 +23,27 @@ class Chunk:
         self.package = package
         self.total_packages = total_packages
         self._acked = False
-        self.content = b""
-
-    def packet(self) -> bytes:  # pragma: no cover
-        return (
-            self._base_packet()
-            + self.content
-            + b"\0" * (MAX_CHUNK_SIZE - len(self.content))
-        )
+        self.content: bytes | memoryview = b""
+        self._packet: bytes | None = None
+
+    def packet(self) -> bytes:
+        # chunks are resent until acked, build the packet only once
+        if self._packet is None:
+            self._packet = b"".join(
+                (
+                    self._base_packet(),
+                    self.content,
+                    bytes(max(0, MAX_CHUNK_SIZE - len(self.content))),
+                ),
+            )
+        return self._packet
 
     def _base_packet(self) -> bytes:
-        return (
-            int(self.type_).to_bytes(2, "little")
-            + self.id.to_bytes(2, "little")
-            + self.total_packages.to_bytes(2, "little")
-            + self.package.to_bytes(2, "little")
+        return _HEADER.pack(
+            int(self.type_),
+            self.id,
+            self.total_packages,
+            self.package,
         )
 
     @property
@@ -43,7 +52,13 @@ class Chunk:
 
 
 class FileChunk(Chunk):
-    def __init__(self, id: int, package: int, total_packages: int, content: bytes):
+    def __init__(
+        self,
+        id: int,
+        package: int,
+        total_packages: int,
+        content: bytes | memoryview,
+    ):
         super().__init__(ChunkType.FILE_CHUNK, id, package, total_packages)
         self.content = content
 
@@ -5,6 +5,7 @@ MAX_CHUNK_SIZE = 60 - HEADER_SIZE
 DATA_TRANSFER_SLEEP_TIME = 1
 STATE_CHANGE_SLEEP_TIME = 0.5
 WAIT_FOR_REQUESTS_SLEEP_TIME = STATE_CHANGE_SLEEP_TIME
+ACK_TIMEOUT_MS = 1000
 HID_REPORT_ID_COMMUNICATION = 1
 HID_REPORT_ID_TRANSFER = 2
 
@@ -1,9 +1,12 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger matthias@bilger.info
 import logging
+import struct
 
 _logger = logging.getLogger(__name__)
 
+_CHUNK_ACK = struct.Struct("<2xHHB")
+
 
 class UpdateError:
     def __init__(self, data: bytes):
@@ -11,7 +14,7 @@ class UpdateError:
         self._parse(data)
 
     def _parse(self, data: bytes) -> None:
-        self.identifier = data[:2].decode("utf-8")
+        self.identifier = bytes(data[:2])
         if not self.is_valid:
             return
         length = max(int.from_bytes(data[2:3], "little"), 33)
@@ -20,7 +23,7 @@ class UpdateError:
 
     @property
     def is_valid(self) -> bool:
-        return self.identifier == "ER"
+        return self.identifier == b"ER"
 
     def __str__(self) -> str:
         if self.is_valid:
@@ -36,16 +39,19 @@ class ChunkAck:
         self._parse(data)
 
     def _parse(self, data: bytes) -> None:
-        self.identifier = data[:2].decode("utf-8")
+        self.identifier = bytes(data[:2])
         if not self.is_valid:
             return
-        self.id = int.from_bytes(data[2:4], "little")
-        self.package = int.from_bytes(data[4:6], "little")
-        self.type_ = int.from_bytes(data[6:7], "little")
+        if len(data) < _CHUNK_ACK.size:
+            # a truncated ack cannot be matched to a chunk
+            _logger.warning("Truncated ack received: %s", data.hex())
+            self.identifier = b""
+            return
+        self.id, self.package, self.type_ = _CHUNK_ACK.unpack_from(data)
 
     @property
     def is_valid(self) -> bool:
-        return self.identifier == "AK"
+        return self.identifier == b"AK"
 
     def __str__(self) -> str:
         if self.is_valid:
@@ -59,10 +65,10 @@ class LogMessage:
         self._parse(data)
 
     def _parse(self, data: bytes) -> None:
-        self.identifier = data[:2].decode("utf-8")
+        self.identifier = bytes(data[:2])
         if not self.is_valid:
             return
-        self.level = "debug" if self.identifier == "LD" else "error"
+        self.level = "debug" if self.identifier == b"LD" else "error"
         end_pos = data.find(0)
         if end_pos == -1:
             end_pos = len(data)
@@ -70,7 +76,7 @@ class LogMessage:
 
     @property
     def is_valid(self) -> bool:
-        return self.identifier in ("LE", "LD")
+        return self.identifier in (b"LE", b"LD")
 
     def __str__(self) -> str:
         if self.is_valid:
@@ -81,12 +87,12 @@ class LogMessage:
 def parse_hid_update_message(data: bytes) -> ChunkAck | UpdateError | LogMessage | None:
     if len(data) < 2:
         return None
-    val = data[:2].decode("utf-8")
-    match val:
-        case "AK":
-            return ChunkAck(data)
-        case "ER":
+    match bytes(data[:2]):
+        case b"AK":
+            ack = ChunkAck(data)
+            return ack if ack.is_valid else None
+        case b"ER":
             return UpdateError(data)
-        case "LD", "LE":
+        case b"LD" | b"LE":
             return LogMessage(data)
     return None
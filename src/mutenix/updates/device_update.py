@@ -2,11 +2,9 @@
 # Copyright (c) 2025 Matthias Bilger <matthias@bilger.info>
 import json
 import logging
-import math
-import os
 import pathlib
+import posixpath
 import tarfile
-import tempfile
 import time
 from collections.abc import Sequence
 from typing import BinaryIO
@@ -19,6 +17,8 @@ from mutenix.updates.chunks import FileChunk
 from mutenix.updates.chunks import FileDelete
 from mutenix.updates.chunks import FileEnd
 from mutenix.updates.chunks import FileStart
+from mutenix.updates.constants import ACK_TIMEOUT_MS
+from mutenix.updates.constants import HEADER_SIZE
 from mutenix.updates.constants import HID_COMMAND_PREPARE_UPDATE
 from mutenix.updates.constants import HID_COMMAND_RESET
 from mutenix.updates.constants import HID_REPORT_ID_COMMUNICATION
@@ -34,47 +34,61 @@ from tqdm import tqdm
 _logger = logging.getLogger(__name__)
 
 
+def _is_firmware_file(name: str) -> bool:
+    return name.endswith((".py", ".delete")) and not name.startswith(".")
+
+
+def extract_update_files(file_stream: BinaryIO) -> list[tuple[str, bytes]]:
+    files: list[tuple[str, bytes]] = []
+    # read the archive as a stream, only the top level firmware files are kept
+    with tarfile.open(fileobj=file_stream, mode="r|gz") as tar:
+        for member in tar:
+            name = posixpath.normpath(member.name)
+            if not member.isfile() or "/" in name or not _is_firmware_file(name):
+                continue
+            extracted = tar.extractfile(member)
+            if extracted is not None:
+                files.append((name, extracted.read()))
+    return files
+
+
 def perform_upgrade_with_file(device: hid.device, file_stream: BinaryIO) -> None:
-    with tempfile.TemporaryDirectory() as tmpdirname:
-        tmpdir = pathlib.Path(tmpdirname)
-        with tarfile.open(fileobj=file_stream, mode="r:gz") as tar:
-            tar.extractall(path=tmpdirname)
-        files = list(
-            map(
-                lambda x: tmpdir / x,
-                filter(
-                    lambda x: (x.endswith(".py") or x.endswith(".delete"))
-                    and not x.startswith("."),
-                    os.listdir(tmpdirname),
-                ),
-            ),
-        )
-        _logger.debug("Updating device with files: %s", files)
-        perform_hid_upgrade(device, files)
-        _logger.info("Successfully updated device firmware")
+    files = extract_update_files(file_stream)
+    _logger.debug("Updating device with files: %s", [name for name, _ in files])
+    perform_hid_upgrade(device, files)
+    _logger.info("Successfully updated device firmware")
 
 
 class TransferFile:
-    def __init__(self, file_id, filename: str | pathlib.Path):
+    def __init__(
+        self,
+        file_id,
+        filename: str | pathlib.Path,
+        content: bytes | None = None,
+    ):
         self.id = file_id
         file = pathlib.Path(filename) if isinstance(filename, str) else filename
         self.filename = file.name
-        self.packages_sent: list[int] = []
         self._chunks: list[Chunk] = []
+        self._chunk_index: dict[tuple[int, int], Chunk] = {}
+        self._next_index = 0
+        self._acked_count = 0
         if self.filename.endswith(".delete"):
             self.filename = self.filename[:-7]
             self._chunks = [FileDelete(self.id, self.filename)]
             return
 
-        with open(file, "r") as f:
-            if file.suffix == ".py":
-                self.content = python_minifier.minify(
-                    f.read(),
-                    remove_annotations=True,
-                    rename_globals=False,
-                ).encode("utf-8")
-            else:
-                self.content = f.read().encode("utf-8")
+        if content is None:
+            with open(file, "rb") as f:
+                content = f.read()
+        if file.suffix == ".py":
+            self.content = python_minifier.minify(
+                content.decode("utf-8"),
+                remove_annotations=True,
+                rename_globals=False,
+            ).encode("utf-8")
+        else:
+            self.content = content
         # Workaround for update issue
         self.size = len(self.content)
         self.content = self.content + b"\x20" * (
@@ -91,7 +105,7 @@ class TransferFile:
         self.add_file_end_chunk()
 
     def calculate_total_packages(self) -> int:
-        return math.ceil(self.size / MAX_CHUNK_SIZE)
+        return (self.size + MAX_CHUNK_SIZE - 1) // MAX_CHUNK_SIZE
 
     def add_file_start_chunk(self, total_packages) -> None:
         self._chunks.append(
@@ -99,13 +113,15 @@ class TransferFile:
         )
 
     def add_file_chunks(self, total_packages) -> None:
+        # slice a view, the packet is copied out of it once when it is built
+        content = memoryview(self.content)
         for i in range(0, self.size, MAX_CHUNK_SIZE):
             self._chunks.append(
                 FileChunk(
                     self.id,
                     i // MAX_CHUNK_SIZE,
                     total_packages,
-                    self.content[i : i + MAX_CHUNK_SIZE],
+                    content[i : i + MAX_CHUNK_SIZE],
                 ),
             )
 
@@ -113,27 +129,28 @@ class TransferFile:
         self._chunks.append(FileEnd(self.id))
 
     def get_next_chunk(self) -> Chunk | None:
-        if self.is_complete():
-            return None
-        return next((chunk for chunk in self._chunks if not chunk.acked), None)
+        # chunks before _next_index are all acked, continue from there
+        while self._next_index < len(self._chunks):
+            chunk = self._chunks[self._next_index]
+            if not chunk.acked:
+                return chunk
+            self._next_index += 1
+        return None
 
     def acknowledge_chunk(self, chunk: ChunkAck) -> None:
         # This line is excluded from coverage reports because it is a safeguard
         # and is unlikely to be met during normal execution.
         if chunk.id != self.id:  # pragma: no cover
             return
-        acked_chunk = next(
-            (
-                x
-                for x in self._chunks
-                if x.type_ == chunk.type_ and x.package == chunk.package
-            ),
-            None,
-        )
+        if not self._chunk_index:
+            self._chunk_index = {(x.type_, x.package): x for x in self._chunks}
+        acked_chunk = self._chunk_index.get((chunk.type_, chunk.package))
         if not acked_chunk:  # pragma: no cover
             _logger.warning("No chunk found for ack")
             return
-        acked_chunk._acked = True
+        if not acked_chunk._acked:
+            acked_chunk._acked = True
+            self._acked_count += 1
         _logger.debug("Acked chunk %s", chunk)
 
     @property
@@ -141,26 +158,52 @@ class TransferFile:
         return len(self._chunks)
 
     def is_complete(self) -> bool:
-        return all(map(lambda x: x.acked, self._chunks))
+        return self._acked_count == len(self._chunks)
+
+
+_COMMAND_REPORTS = {
+    command: bytes((HID_REPORT_ID_COMMUNICATION, command)) + bytes(7)
+    for command in (HID_COMMAND_PREPARE_UPDATE, HID_COMMAND_RESET)
+}
+_COMPLETED_REPORT = bytes((HID_REPORT_ID_TRANSFER,)) + Completed().packet()
 
 
 def send_hid_command(device: hid.device, command: int) -> None:
-    device.write([HID_REPORT_ID_COMMUNICATION, command] + [0] * 7)
+    report = _COMMAND_REPORTS.get(command)
+    if report is None:
+        report = bytes((HID_REPORT_ID_COMMUNICATION, command)) + bytes(7)
+    device.write(report)
 
 
 def perform_hid_upgrade(
     device: hid.device,
-    files: Sequence[str | pathlib.Path],
+    files: Sequence[str | pathlib.Path | tuple[str, bytes]],
 ) -> None:
     _logger.debug("Opening device for update")
+    # reads without timeout must only poll, the ack wait uses an explicit timeout
+    device.set_nonblocking(1)
     _logger.debug("Sending prepare update")
     send_hid_command(device, HID_COMMAND_PREPARE_UPDATE)
     time.sleep(STATE_CHANGE_SLEEP_TIME)
 
-    transfer_files = [TransferFile(file_id, file) for file_id, file in enumerate(files)]
+    transfer_files = [
+        (
+            TransferFile(file_id, *file)
+            if isinstance(file, tuple)
+            else TransferFile(file_id, file)
+        )
+        for file_id, file in enumerate(files)
+    ]
+
+    files_by_id = {f.id: f for f in transfer_files}
+    # every chunk is sent through the same report buffer
+    report = bytearray(1 + HEADER_SIZE + MAX_CHUNK_SIZE)
+    report[0] = HID_REPORT_ID_TRANSFER
 
     _logger.debug("Preparing to send %s files", len(transfer_files))
     cancelled = False
+    # slicing the packet for the log line is skipped unless it is shown
+    log_chunks = _logger.isEnabledFor(logging.DEBUG)
 
     for i, file in enumerate(transfer_files, 1):
         if cancelled:
@@ -169,41 +212,42 @@ def perform_hid_upgrade(
             total=file.chunks,
             desc=f"Sending file {file.filename:25} {i:2}/{len(transfer_files)}",
         )
+        in_flight = False
         while True:
-            received = device.read(100, 1000)
+            # Only block for an answer while a chunk waits for its ack, so a new
+            # file does not start with an idle read timeout.
+            received = device.read(100, ACK_TIMEOUT_MS if in_flight else 0)
             if len(received) > 0:
                 rcvd = parse_hid_update_message(bytes(received[1:]))
 
                 if isinstance(rcvd, ChunkAck):
-                    ack_file = next(
-                        (f for f in transfer_files if f.id == rcvd.id),
-                        None,
-                    )
+                    ack_file = files_by_id.get(rcvd.id)
                     if not ack_file:
                         _logger.warning("No file id found for ack")
                         continue
                     fileprogress.update(1)
                     ack_file.acknowledge_chunk(rcvd)
                 elif isinstance(rcvd, UpdateError):
-                    print("Error received from device: ", rcvd)
                     _logger.error("Error received from device: %s", rcvd)
                     cancelled = True
                     break
                 elif isinstance(rcvd, LogMessage):
-                    print(rcvd)
+                    _logger.info("Device log %s", rcvd)
 
             chunk = file.get_next_chunk()
             if not chunk:
                 fileprogress.close()
                 break
-            _logger.debug(
-                "Sending chunk (%s...) of file %s",
-                chunk.packet()[:10],
-                file.filename,
-            )
-            cnk = bytes((HID_REPORT_ID_TRANSFER,)) + chunk.packet()
+            if log_chunks:
+                _logger.debug(
+                    "Sending chunk (%s...) of file %s",
+                    chunk.packet()[:10],
+                    file.filename,
+                )
+            report[1:] = chunk.packet()
             try:
-                device.write(cnk)
+                device.write(report)
+                in_flight = True
             except Exception as e:
                 _logger.error("Failed to write chunk to device: %s", e)
                 cancelled = True
@@ -211,10 +255,9 @@ def perform_hid_upgrade(
 
     time.sleep(STATE_CHANGE_SLEEP_TIME)
     try:
-        device.write(bytes((HID_REPORT_ID_TRANSFER,)) + Completed().packet())
+        device.write(_COMPLETED_REPORT)
     except Exception as e:
         _logger.error("Failed to write Completed packet to device: %s", e)
     time.sleep(STATE_CHANGE_SLEEP_TIME)
-    print("Resetting")
     _logger.info("Resetting")
     send_hid_command(device, HID_COMMAND_RESET)
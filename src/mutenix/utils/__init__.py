@@ -11,11 +11,12 @@ import time
 
 _logger = logging.getLogger(__name__)
 
-if platform.system().lower() == "windows":  # pragma: no cover
+_system = platform.system().lower()
+if _system == "windows":  # pragma: no cover
     from mutenix.utils.windows import bring_teams_to_foreground, ensure_process_run_once
-elif platform.system().lower() == "linux":  # pragma: no cover
+elif _system == "linux":  # pragma: no cover
     from mutenix.utils.linux import bring_teams_to_foreground, ensure_process_run_once
-elif platform.system().lower() == "darwin":  # pragma: no cover
+elif _system == "darwin":  # pragma: no cover
     from mutenix.utils.darwin import bring_teams_to_foreground, ensure_process_run_once
 else:
     _logger.error("Platform not supported")
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger <matthias@bilger.info>
-import os
+import subprocess
 
 from mutenix.utils.linux import ensure_process_run_once
 
@@ -15,9 +15,15 @@ def bring_teams_to_foreground() -> None:  # pragma: no cover
 
     On macOS, it uses AppleScript commands to activate the application and set it as frontmost.
     """
-    os.system("osascript -e 'tell application \"Microsoft Teams\" to activate'")
-    os.system(
-        'osascript -e \'tell application "System Events" to tell process "Microsoft Teams" to set frontmost to true\'',
+    subprocess.run(
+        [
+            "osascript",
+            "-e",
+            'tell application "Microsoft Teams" to activate',
+            "-e",
+            'tell application "System Events" to tell process "Microsoft Teams" to set frontmost to true',
+        ],
+        check=False,
     )
 
 
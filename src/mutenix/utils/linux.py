@@ -6,26 +6,54 @@ import pathlib
 import subprocess
 import sys
 import tempfile
+import time
 
 import psutil
 
 _logger = logging.getLogger(__name__)
 
+TEAMS_WINDOW_CACHE_TTL = 5.0
+"""Seconds a Microsoft Teams window lookup is reused before searching again."""
+
+_teams_window_cache: tuple[float, list[str]] | None = None
+
+
+def _find_teams_windows(use_cache: bool = True) -> list[str]:
+    """Return the window ids of Microsoft Teams, reusing a recent lookup."""
+    global _teams_window_cache
+    now = time.monotonic()
+    if (
+        use_cache
+        and _teams_window_cache
+        and now - _teams_window_cache[0] < TEAMS_WINDOW_CACHE_TTL
+    ):
+        return _teams_window_cache[1]
+    window_ids = (
+        subprocess.check_output(["xdotool", "search", "--name", "Microsoft Teams"])
+        .decode()
+        .split()
+    )
+    _teams_window_cache = (now, window_ids) if window_ids else None
+    return window_ids
+
+
+def _activate_window(window_id: str) -> int:  # pragma: no cover
+    return subprocess.run(["xdotool", "windowactivate", window_id]).returncode
+
 
 def bring_teams_to_foreground() -> None:  # pragma: no cover
+    global _teams_window_cache
     try:
+        cached = _teams_window_cache is not None
         # Get the window ID of Microsoft Teams
-        window_id = (
-            subprocess.check_output(
-                "xdotool search --name 'Microsoft Teams'",
-                shell=True,
-            )
-            .strip()
-            .decode()
-        )
+        window_ids = _find_teams_windows()
         # Activate the window
-        os.system(f"xdotool windowactivate {window_id}")
+        if _activate_window(window_ids[0]) != 0 and cached:
+            # The cached window is gone, search again
+            window_ids = _find_teams_windows(use_cache=False)
+            _activate_window(window_ids[0])
     except Exception as e:
+        _teams_window_cache = None
         _logger.error("Microsoft Teams window not found: %s", e)
 
 
@@ -4,6 +4,7 @@ import logging
 import pathlib
 import sys
 import tempfile
+import time
 
 import win32api  # type: ignore
 import win32con  # type: ignore
@@ -14,6 +15,26 @@ from winerror import ERROR_ALREADY_EXISTS  # type: ignore
 
 _logger = logging.getLogger(__name__)
 
+TEAMS_WINDOW_CACHE_TTL = 5.0
+"""Seconds a Microsoft Teams window lookup is reused before searching again."""
+
+_teams_window_cache: tuple[float, list[int]] | None = None
+
+
+def _find_teams_windows(use_cache: bool = True) -> list[int]:  # pragma: no cover
+    """Return the window handles of Microsoft Teams, reusing a recent lookup."""
+    global _teams_window_cache
+    now = time.monotonic()
+    if (
+        use_cache
+        and _teams_window_cache
+        and now - _teams_window_cache[0] < TEAMS_WINDOW_CACHE_TTL
+    ):
+        return _teams_window_cache[1]
+    window_ids = find_windows(title_re=".*Teams.*")
+    _teams_window_cache = (now, window_ids) if window_ids else None
+    return window_ids
+
 
 def bring_teams_to_foreground() -> None:  # pragma: no cover
     """
@@ -26,9 +47,13 @@ def bring_teams_to_foreground() -> None:  # pragma: no cover
     On Windows, it uses the `win32gui` and `win32con` modules to minimize and restore the window.
     Note: This function will not be coverable due to its OS dependencies.
     """
+    global _teams_window_cache
     try:
         _logger.debug("Finding Microsoft Teams window")
-        window_id = find_windows(title_re=".*Teams.*")
+        window_id = _find_teams_windows()
+        if not all(win32gui.IsWindow(w) for w in window_id):
+            _logger.debug("Cached Microsoft Teams window is gone, searching again")
+            window_id = _find_teams_windows(use_cache=False)
         _logger.debug("Window ID: %s", window_id)
         for w in window_id:
             _logger.debug("Minimizing and restoring window %s", w)
@@ -38,6 +63,7 @@ def bring_teams_to_foreground() -> None:  # pragma: no cover
             win32gui.ShowWindow(w, win32con.SW_SHOWNORMAL)
             win32gui.SetActiveWindow(w)
     except Exception as e:
+        _teams_window_cache = None
         _logger.warning(
             "Could not bring Microsoft Teams window to the foreground, %s",
             e,
@@ -69,4 +69,4 @@ class WebServer:
         self.api_handler.register_callback(callback)
 
     async def send_msg(self, msg: HidOutputMessage):
-        self.websocket_handler.send_msg(msg)
+        await self.websocket_handler.send_msg(msg)
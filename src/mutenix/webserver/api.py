@@ -37,7 +37,7 @@ class APIHandler:
         try:
             data = ButtonRequest.model_validate_json(await request.text())
         except ValidationError as e:
-            _logger.error(f"Invalid button request: {e}")
+            _logger.error("Invalid button request: %s", e)
             return web.Response(status=400)
         await self._handle_msg(Status.trigger_button(data.button))
         return web.Response(status=200)
@@ -53,10 +53,10 @@ class APIHandler:
         try:
             data = LedRequest.model_validate_json(await request.text())
         except ValidationError as e:
-            _logger.error(f"Invalid Led request: {e}")
+            _logger.error("Invalid Led request: %s", e)
             return web.Response(status=400)
         if data.color not in LedColor:
-            _logger.error(f"Invalid color: {data.color}")
+            _logger.error("Invalid color: %s", data.color)
             return web.Response(status=400)
         if data.button > 10 or data.button < 1:
             return web.Response(status=404)
@@ -67,7 +67,7 @@ class APIHandler:
         try:
             button = int(request.query.get("button", 0))
         except Exception as e:
-            _logger.error(f"Invalid button: {e}")
+            _logger.error("Invalid button: %s", e)
             return web.Response(status=400)
         if button > 10:
             return web.Response(status=404)
@@ -9,7 +9,11 @@ from mutenix.version import PATCH
 
 class Helper:
     @staticmethod
-    def render_template(template_name, request, context, status=200) -> web.Response:
+    def render_string(template_name, request, context) -> str:
         context["mutenix_version"] = f"{MAJOR}.{MINOR}.{PATCH}"
-        content = get_env(request.app).get_template(template_name).render(context)
+        return get_env(request.app).get_template(template_name).render(context)
+
+    @staticmethod
+    def render_template(template_name, request, context, status=200) -> web.Response:
+        content = Helper.render_string(template_name, request, context)
         return web.Response(text=content, content_type="text/html", status=status)
@@ -29,7 +29,7 @@ class PageHandler:
             try:
                 content = (path / filename).open().read()
             except Exception as e:
-                _logger.info(f"{filename} not found: Exception {e}")
+                _logger.info("%s not found: Exception %s", filename, e)
                 continue
         else:
             content = f"{filename} not found"
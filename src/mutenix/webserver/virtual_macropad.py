@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger matthias@bilger.info
+import gzip
+
 from aiohttp import web
 from mutenix.webserver.helper import Helper
 
@@ -7,12 +9,35 @@ from mutenix.webserver.helper import Helper
 class VirtualMacropadHandler:
     def __init__(self, config):
         self._config = config
+        self._pages: dict[str, tuple[bytes, bytes]] = {}
+
+    def _render_cached(
+        self,
+        template_name: str,
+        request: web.Request,
+    ) -> web.Response:
+        """Serve a static page, rendered and gzip compressed on first request only."""
+        page = self._pages.get(template_name)
+        if page is None:
+            body = Helper.render_string(template_name, request, {}).encode("utf-8")
+            page = self._pages[template_name] = (body, gzip.compress(body))
+        body, compressed = page
+        headers = {"Vary": "Accept-Encoding"}
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            body = compressed
+            headers["Content-Encoding"] = "gzip"
+        return web.Response(
+            body=body,
+            content_type="text/html",
+            charset="utf-8",
+            headers=headers,
+        )
 
     async def handle_index(self, request: web.Request) -> web.Response:
-        return Helper.render_template("index.html", request, {})
+        return self._render_cached("index.html", request)
 
     async def handle_popup(self, request: web.Request) -> web.Response:
-        return Helper.render_template("popup.html", request, {})
+        return self._render_cached("popup.html", request)
 
     def setup_routes(self, app: web.Application, prefix: str = "") -> None:
         app.router.add_route("GET", f"{prefix}/", self.handle_index)
@@ -12,6 +12,9 @@ from mutenix.models.hid_commands import Status
 
 _logger = logging.getLogger(__name__)
 
+_encode_json = json.JSONEncoder(separators=(",", ":")).encode
+"""Compact encoder for outgoing LED frames, built once instead of per call."""
+
 
 class UnsupportedMessageTypeError(Exception):
     """Exception raised for unsupported message types in VirtualMacropad."""
@@ -25,12 +28,21 @@ class WebSocketHandler:
         self._websockets: set[web.WebSocketResponse] = set()
         self._led_status: dict[int, str] = {}
         self._led_status_lock = asyncio.Lock()
+        self._state_snapshot: str | None = None
 
     async def handle_state_request(self, ws) -> None:
         async with self._led_status_lock:
-            for i, color in self._led_status.items():
-                if color:
-                    await ws.send_json({"button": i, "color": color})
+            if self._state_snapshot is None:
+                self._state_snapshot = _encode_json(
+                    [
+                        {"button": i, "color": color}
+                        for i, color in self._led_status.items()
+                        if color
+                    ],
+                )
+            snapshot = self._state_snapshot
+        if snapshot != "[]":
+            await ws.send_str(snapshot)
 
     async def websocket_handler(self, request: web.Request) -> web.WebSocketResponse:
         ws = web.WebSocketResponse()
@@ -60,17 +72,17 @@ class WebSocketHandler:
             await callback(msg)
 
     @staticmethod
-    async def _send_json_safe(ws, data) -> None:
+    async def _send_str_safe(ws, data: str) -> None:
         try:
-            await ws.send_json(data)
+            await ws.send_str(data)
         except Exception as e:
             _logger.error("Error sending LED status: %s to websocket %s", e, ws)
 
-    def _send_led_status(self, button: int, color: str) -> None:
-        for ws in self._websockets:
-            asyncio.create_task(
-                self._send_json_safe(ws, {"button": button, "color": color}),
-            )
+    async def _send_led_status(self, button: int, color: str) -> None:
+        payload = _encode_json({"button": button, "color": color})
+        await asyncio.gather(
+            *(self._send_str_safe(ws, payload) for ws in self._websockets),
+        )
 
     def setup_routes(self, app: web.Application, prefix: str = "/ws") -> None:
         app.router.add_route("GET", f"{prefix}", self.websocket_handler)
@@ -82,8 +94,11 @@ class WebSocketHandler:
         if isinstance(msg, SetLed):
             color = msg.color.name.lower()
             async with self._led_status_lock:
+                if self._led_status.get(msg.id) == color:
+                    return
                 self._led_status[msg.id] = color
-            self._send_led_status(msg.id, color)
+                self._state_snapshot = None
+            await self._send_led_status(msg.id, color)
         else:
             raise UnsupportedMessageTypeError("Unsupported message type")
         _logger.debug("Sent message: %s", msg)
@@ -1,10 +1,12 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2025 Matthias Bilger <matthias@bilger.info>
 import asyncio
+import collections
 import logging
 import time
 from collections.abc import Coroutine
 from typing import Callable
+from urllib.parse import urlencode
 
 import websockets
 from mutenix.models.state import ConnectionState
@@ -47,21 +49,24 @@ class TeamsWebSocketClient:
         self._state = state
         self._uri = uri
         self._connection = None
-        self._send_queue: asyncio.Queue[tuple[ClientMessage, asyncio.Future]] = (
-            asyncio.Queue()
-        )
+        self._send_deque: collections.deque[
+            tuple[ClientMessage, asyncio.Future | None]
+        ] = collections.deque()
+        self._send_event = asyncio.Event()
         self._callback: (
             Callable[[ServerMessage], Coroutine[None, None, None]] | None
         ) = None
-        params = (
-            f"?protocol-version={identifier.protocol_version}"
-            f"&manufacturer={identifier.manufacturer}"
-            f"&device={identifier.device}"
-            f"&app={identifier.app}"
-            f"&app-version={identifier.app_version}"
-            f"&token={identifier.token}"
+        params = urlencode(
+            {
+                "protocol-version": identifier.protocol_version,
+                "manufacturer": identifier.manufacturer,
+                "device": identifier.device,
+                "app": identifier.app,
+                "app-version": identifier.app_version,
+                "token": identifier.token,
+            },
         )
-        self._uri += params
+        self._uri += f"?{params}"
         self._connecting = False
         self._run = True
         self._sent_something = True
@@ -81,7 +86,8 @@ class TeamsWebSocketClient:
 
     async def _do_connect(self) -> ClientConnection | None:
         try:
-            connection = await websockets.connect(self._uri)
+            # Teams runs on localhost, compressing its small frames only costs CPU
+            connection = await websockets.connect(self._uri, compression=None)
             _logger.info("Connected to WebSocket server at %s", self._uri)
             return connection
         except Exception as e:
@@ -93,10 +99,16 @@ class TeamsWebSocketClient:
             return None
 
     def send_message(self, message: ClientMessage) -> asyncio.Future:
-        future = asyncio.get_event_loop().create_future()
-        self._send_queue.put_nowait((message, future))
+        future = asyncio.get_running_loop().create_future()
+        self._send_deque.append((message, future))
+        self._send_event.set()
         return future
 
+    def send_message_nowait(self, message: ClientMessage) -> None:
+        """Queue a message for Teams without a future to wait on."""
+        self._send_deque.append((message, None))
+        self._send_event.set()
+
     def register_callback(
         self,
         callback: Callable[[ServerMessage], Coroutine[None, None, None]],
@@ -104,35 +116,37 @@ class TeamsWebSocketClient:
         self._callback = callback
 
     async def _send(self) -> None:
-        try:
-            queue_element = self._send_queue.get_nowait()
-            message, future = queue_element
-        except asyncio.QueueEmpty:
+        if not self._send_deque:
             if self._sent_something:
                 self._sent_something = False
                 _logger.debug("Send queue empty")
-            await asyncio.sleep(0.2)
-            return
+            self._send_event.clear()
+            await self._send_event.wait()
+            if not self._send_deque:
+                # woken up by stop
+                return
+        message, future = self._send_deque.popleft()
         try:
             if isinstance(message, ClientMessage):
-                msg = message.model_dump_json(by_alias=True)
+                msg = message.to_json()
                 self._sent_something = True
             else:
-                future.set_exception(
-                    TypeError("Expected message to be an instance of ClientMessage"),
-                )
+                error = TypeError("Expected message to be an instance of ClientMessage")
+                if future is None:
+                    _logger.error("Dropping message: %s", error)
+                else:
+                    future.set_exception(error)
                 return
             if not self._connection:
                 await asyncio.sleep(0.1)
                 return
             await self._connection.send(msg)
-            if not future.done():
+            if future is not None and not future.done():
                 future.set_result(True)
         except Exception as e:
-            future.set_exception(e)
+            if future is not None:
+                future.set_exception(e)
             await self._connect()
-        finally:
-            self._send_queue.task_done()
 
     async def _receive(self) -> None:
         try:
@@ -140,14 +154,21 @@ class TeamsWebSocketClient:
                 if not self._connection:
                     await asyncio.sleep(0.1)
                     return
-                msg = await self._connection.recv()
+                # the JSON parser takes the raw frame, skip decoding it to str first
+                msg = await self._connection.recv(decode=False)
                 _logger.debug("Received message: %s", msg)
                 message = ServerMessage.model_validate_json(msg)
                 if not message:
                     return
                 _logger.debug("Decoded message: %s", message)
-                merge_state = self._state.state.model_dump() | message.model_dump()
-                self._state.state = ServerMessage.model_validate(merge_state)
+                # merge the received fields as they are, dumping the message to a
+                # dict would turn nested models into plain dicts on every receive
+                self._state.state = self._state.state.model_copy(
+                    update={
+                        field: getattr(message, field)
+                        for field in message.model_fields_set
+                    },
+                )
                 self._state.last_received_timestamp = time.time()
                 if self._callback:
                     if asyncio.iscoroutinefunction(self._callback):
@@ -178,10 +199,11 @@ class TeamsWebSocketClient:
         self._run = False
         if self._connection:
             await self._connection.close()
-        while not self._send_queue.empty():
-            _, future = self._send_queue.get_nowait()
-            future.set_exception(RuntimeError("WebSocketClient is stopping"))
-            self._send_queue.task_done()
+        while self._send_deque:
+            _, future = self._send_deque.popleft()
+            if future is not None:
+                future.set_exception(RuntimeError("WebSocketClient is stopping"))
+        self._send_event.set()
 
     @property
     def connected(self) -> bool:  # pragma: no cover
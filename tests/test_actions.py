@@ -73,6 +73,12 @@ def test_keyboard_action_type(mock_keyboard_controller):
     mock_keyboard_controller().type.assert_called_once_with("hello")
 
 
+def test_keyboard_action_reuses_controller(mock_keyboard_controller):
+    keyboard_action(Keyboard(press=Key(key="a")))
+    keyboard_action(Keyboard(release=Key(key="a")))
+    assert mock_keyboard_controller.call_count == 1
+
+
 def test_mouse_action_move(mock_mouse_controller):
     action = Mouse(move=MousePosition(x=100, y=200))
     mouse_action(action)
@@ -2,27 +2,43 @@
 # Copyright (c) 2025 Matthias Bilger matthias@bilger.info
 from __future__ import annotations
 
+import json
 import os
 from pathlib import Path
+from unittest.mock import Mock
 from unittest.mock import mock_open
 from unittest.mock import patch
 
+import pydantic
+import pytest
 import yaml
 from mutenix.config import CONFIG_FILENAME
 from mutenix.config import find_config_file
+from mutenix.config import invalidate_config_cache
 from mutenix.config import load_config
 from mutenix.config import save_config
+from mutenix.models.config import ActionDetails
 from mutenix.models.config import Config
+from mutenix.models.config import Keyboard
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(tmp_path, monkeypatch):
+    # keep a real mutenix.yaml (and its sidecar) in the cwd out of these tests
+    monkeypatch.chdir(tmp_path)
+    invalidate_config_cache()
+    yield
+    invalidate_config_cache()
 
 
 def test_find_config_file_default_location():
-    with patch("pathlib.Path.exists", return_value=True):
+    with patch("mutenix.config._stat_config", return_value=Mock()):
         config_path = find_config_file()
         assert config_path == Path(CONFIG_FILENAME)
 
 
 def test_find_config_file_not_found():
-    with patch("pathlib.Path.exists", return_value=False):
+    with patch("mutenix.config._stat_config", return_value=None):
         config_path = find_config_file()
         assert config_path == Path(CONFIG_FILENAME)
 
@@ -61,7 +77,7 @@ def test_load_config_yaml_error():
     with (
         patch("pathlib.Path.exists", return_value=True),
         patch("builtins.open", mock_open(read_data="invalid_yaml")),
-        patch("yaml.safe_load", side_effect=yaml.YAMLError),
+        patch("yaml.load", side_effect=yaml.YAMLError),
         patch("mutenix.models.config.Config") as mock_create_default_config,
         patch("mutenix.config.save_config") as mock_save_config,
     ):
@@ -86,7 +102,7 @@ def test_load_config_success():
     with (
         patch("pathlib.Path.exists", return_value=True),
         patch("builtins.open", mock_open(read_data=yaml.dump(config_data))),
-        patch("yaml.safe_load", return_value=config_data),
+        patch("yaml.load", return_value=config_data),
     ):
         config = load_config()
         assert config.model_dump() == Config(**config_data).model_dump()
@@ -132,7 +148,7 @@ def test_load_config_with_valid_file():
     with (
         patch("pathlib.Path.exists", return_value=True),
         patch("builtins.open", mock_open(read_data=yaml.dump(config_data))),
-        patch("yaml.safe_load", return_value=config_data),
+        patch("yaml.load", return_value=config_data),
     ):
         config = load_config()
         assert config.actions[0].button_id == 1
@@ -146,7 +162,7 @@ def test_load_config_with_invalid_yaml():
     with (
         patch("pathlib.Path.exists", return_value=True),
         patch("builtins.open", mock_open(read_data="invalid_yaml")),
-        patch("yaml.safe_load", side_effect=yaml.YAMLError),
+        patch("yaml.load", side_effect=yaml.YAMLError),
         patch("mutenix.models.config.Config") as mock_create_default_config,
         patch("mutenix.config.save_config") as mock_save_config,
     ):
@@ -168,13 +184,13 @@ def test_save_config():
 
 
 def test_find_config_file_in_current_directory():
-    with patch("pathlib.Path.exists", side_effect=[True, False]):
+    with patch("mutenix.config._stat_config", side_effect=[Mock(), None]):
         config_path = find_config_file()
         assert config_path == Path(CONFIG_FILENAME)
 
 
 def test_find_config_file_in_home_directory():
-    with patch("pathlib.Path.exists", side_effect=[False, True]):
+    with patch("mutenix.config._stat_config", side_effect=[None, Mock()]):
         home_config_path = (
             Path.home() / os.environ.get("XDG_CONFIG_HOME", ".config") / CONFIG_FILENAME
         )
@@ -183,7 +199,7 @@ def test_find_config_file_in_home_directory():
 
 
 def test_find_config_file_not_found_anywhere():
-    with patch("pathlib.Path.exists", return_value=False):
+    with patch("mutenix.config._stat_config", return_value=None):
         config_path = find_config_file()
         assert config_path == Path(CONFIG_FILENAME)
 
@@ -206,7 +222,7 @@ def test_load_config_with_file_path():
     with (
         patch("pathlib.Path.exists", return_value=True),
         patch("builtins.open", mock_open(read_data=yaml.dump(config_data))),
-        patch("yaml.safe_load", return_value=config_data),
+        patch("yaml.load", return_value=config_data),
     ):
         config = load_config(Path("custom_config.yaml"))
         assert config.actions[0].button_id == 1
@@ -234,7 +250,7 @@ def test_load_config_with_old_config_conversion():
     with (
         patch("pathlib.Path.exists", return_value=True),
         patch("builtins.open", mock_open(read_data=yaml.dump(old_config_data))),
-        patch("yaml.safe_load", return_value=old_config_data),
+        patch("yaml.load", return_value=old_config_data),
         patch(
             "mutenix.utils.config_converter.convert_old_config",
             return_value=converted_config,
@@ -247,3 +263,130 @@ def test_load_config_with_old_config_conversion():
             converted_config,
             Path(CONFIG_FILENAME),
         )
+
+
+def test_load_config_reuses_parsed_file(tmp_path):
+    file_path = tmp_path / CONFIG_FILENAME
+    file_path.write_text(yaml.dump({"version": 1, "auto_update": False}))
+    with patch("yaml.load", wraps=yaml.load) as mock_load:
+        first = load_config(file_path)
+        second = load_config(file_path)
+        assert mock_load.call_count == 1
+        assert first.auto_update is False
+        assert second.auto_update is False
+
+        file_path.write_text(yaml.dump({"version": 1, "auto_update": True}))
+        third = load_config(file_path)
+        assert mock_load.call_count == 2
+        assert third.auto_update is True
+
+
+def test_load_config_uses_json_sidecar(tmp_path):
+    file_path = tmp_path / CONFIG_FILENAME
+    file_path.write_text(yaml.dump({"version": 1, "auto_update": False}))
+    load_config(file_path)
+    assert (tmp_path / (CONFIG_FILENAME + ".cache.json")).exists()
+
+    invalidate_config_cache()
+    with patch("yaml.load", wraps=yaml.load) as mock_load:
+        config = load_config(file_path)
+        mock_load.assert_not_called()
+        assert config.auto_update is False
+
+        file_path.write_text(yaml.dump({"version": 1, "auto_update": True}))
+        config = load_config(file_path)
+        mock_load.assert_called_once()
+        assert config.auto_update is True
+
+
+def test_default_config_is_valid():
+    config = Config()
+    validated = Config.model_validate(config.model_dump())
+    assert validated.model_dump() == config.model_dump()
+    assert config.actions[3].actions[0].teams_reaction.reaction == "like"
+
+
+def test_load_config_returns_copy_of_loaded_config(tmp_path):
+    file_path = tmp_path / CONFIG_FILENAME
+    file_path.write_text(yaml.dump({"version": 1, "auto_update": False}))
+    with patch.object(
+        Config,
+        "model_validate",
+        wraps=Config.model_validate,
+    ) as mock_validate:
+        first = load_config(file_path)
+        first.auto_update = True
+        second = load_config(file_path)
+        mock_validate.assert_called_once()
+        assert second is not first
+        assert second.auto_update is False
+        assert second._internal_state == "file"
+
+        invalidate_config_cache()
+        load_config(file_path)
+        assert mock_validate.call_count == 2
+
+
+def test_default_config_does_not_share_mutable_defaults():
+    first = Config()
+    second = Config()
+    first.device_identifications.clear()
+    first.virtual_keypad.bind_port = 8080
+    assert len(second.device_identifications) == 3
+    assert second.virtual_keypad.bind_port == 12909
+    assert second.logging.level == "info"
+
+
+def test_config_rejects_duplicate_button_ids():
+    action = {"button_id": 1, "actions": [{"meeting_action": "toggle-mute"}]}
+    led = {"button_id": 1, "off": True}
+    with pytest.raises(pydantic.ValidationError):
+        Config.model_validate({"actions": [action, action]})
+    with pytest.raises(pydantic.ValidationError):
+        Config.model_validate({"leds": [led, led]})
+
+
+def test_save_config_writes_json_sidecar(tmp_path):
+    file_path = tmp_path / CONFIG_FILENAME
+    config = Config(auto_update=False, version=1)
+    config._internal_state = "file"
+    save_config(config, file_path)
+    assert (tmp_path / (CONFIG_FILENAME + ".cache.json")).exists()
+
+    invalidate_config_cache()
+    with patch("yaml.load", wraps=yaml.load) as mock_load:
+        loaded = load_config(file_path)
+        mock_load.assert_not_called()
+    assert loaded.auto_update is False
+    assert file_path.read_text().startswith("version: 1\n")
+    assert yaml.safe_load(file_path.read_text()) == config.model_dump(
+        mode="json",
+        exclude_none=True,
+        exclude_unset=True,
+    )
+
+
+def test_at_least_one_option_required():
+    with pytest.raises(pydantic.ValidationError):
+        ActionDetails.model_validate({"activate_teams": False})
+    with pytest.raises(pydantic.ValidationError):
+        Keyboard.model_validate({})
+    assert ActionDetails.model_validate({"command": "echo"}).command == "echo"
+
+
+def test_json_sidecar_round_trip(tmp_path):
+    file_path = tmp_path / CONFIG_FILENAME
+    file_path.write_text(yaml.dump({"version": 1, "auto_update": False}))
+    load_config(file_path)
+
+    sidecar_path = tmp_path / (CONFIG_FILENAME + ".cache.json")
+    sidecar = json.loads(sidecar_path.read_text())
+    stat = file_path.stat()
+    assert sidecar["source"] == [stat.st_mtime_ns, stat.st_size]
+    assert sidecar["config"] == {"version": 1, "auto_update": False}
+
+    # prove the next load takes its data from the sidecar, not the yaml
+    sidecar["config"]["auto_update"] = True
+    sidecar_path.write_text(json.dumps(sidecar))
+    invalidate_config_cache()
+    assert load_config(file_path).auto_update is True
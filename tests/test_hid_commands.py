@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import pytest
+from mutenix.models.hid_commands import HardwareTypes
 from mutenix.models.hid_commands import HidInCommands
 from mutenix.models.hid_commands import HidInputMessage
 from mutenix.models.hid_commands import HidOutCommands
@@ -32,6 +33,21 @@ def test_version_info():
     assert version_info.type.name == "FIVE_BUTTON_USB"
 
 
+def test_version_info_unknown_type():
+    buffer = bytes([1, 0, 0, 0x42])
+    version_info = VersionInfo(buffer)
+    assert version_info.version == "1.0.0"
+    assert version_info.type is HardwareTypes.UNKNOWN
+
+
+def test_from_buffer_version_info_unknown_type():
+    buffer = bytes([0, HidInCommands.VERSION_INFO, 2, 1, 0, 0x42, 0, 0])
+    message = HidInputMessage.from_buffer(buffer)
+    assert isinstance(message, VersionInfo)
+    assert message.version == "2.1.0"
+    assert message.type is HardwareTypes.UNKNOWN
+
+
 def test_reset():
     reset = Reset()
     buffer = reset.to_buffer()
@@ -47,6 +63,13 @@ def test_set_led():
     )
 
 
+def test_set_led_report_is_built_once():
+    led = SetLed(1, LedColor.RED)
+    assert led.to_report() is led.to_report()
+    assert led.to_report() == bytes([led.REPORT_ID]) + led.to_buffer()
+    assert led.to_report()[-1] == led._current_counter
+
+
 def test_from_buffer_version_info():
     buffer = bytes([0, HidInCommands.VERSION_INFO, 1, 2, 3, 4, 5, 6])
     message = HidInputMessage.from_buffer(buffer)
@@ -109,6 +132,11 @@ def test_update_config_to_buffer_debug_and_filesystem():
     )
 
 
+def test_to_report_prefixes_report_id():
+    for command in (UpdateConfig(), Reset(), SetLed(2, LedColor.BLUE)):
+        assert command.to_report() == bytes([command.REPORT_ID]) + command.to_buffer()
+
+
 def test_update_config_str_default():
     update_config = UpdateConfig()
     assert str(update_config) == "UpdateConfig { debug: 0, filesystem: 0 }"
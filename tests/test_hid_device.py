@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import asyncio
+import gc
+import threading
 import tracemalloc
 from unittest.mock import ANY
 from unittest.mock import AsyncMock
@@ -13,8 +15,10 @@ import pytest
 from mutenix.hid_device import HidDevice
 from mutenix.models.config import DeviceInfo
 from mutenix.models.hid_commands import HidOutputMessage
+from mutenix.models.hid_commands import LedColor
 from mutenix.models.hid_commands import Ping
 from mutenix.models.hid_commands import PrepareUpdate
+from mutenix.models.hid_commands import SetLed
 
 tracemalloc.start()
 
@@ -36,7 +40,7 @@ async def test_send_msg(hid_device):
     msg = HidOutputMessage()
     future = hid_device.send_msg(msg)
     assert not future.done()
-    assert not hid_device._send_buffer.empty()
+    assert hid_device._send_deque
 
 
 @pytest.mark.asyncio
@@ -66,6 +70,74 @@ async def test_write_success(hid_device):
     assert future.result() == 1
 
 
+@pytest.mark.asyncio
+async def test_write_nowait(hid_device):
+    msg = HidOutputMessage()
+    hid_device.send_msg_nowait(msg)
+    with patch.object(hid_device, "_send_report", return_value=1) as send_report:
+        await hid_device._write()
+    send_report.assert_called_once_with(msg)
+    assert not hid_device._send_deque
+
+
+@pytest.mark.asyncio
+async def test_write_waits_for_message(hid_device):
+    msg = HidOutputMessage()
+    with patch.object(hid_device, "_send_report", return_value=1) as send_report:
+        write = asyncio.create_task(hid_device._write())
+        await asyncio.sleep(0)
+        send_report.assert_not_called()
+        future = hid_device.send_msg(msg)
+        await write
+    send_report.assert_called_once_with(msg)
+    assert future.result() == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_releases_device(hid_device):
+    device = Mock()
+    hid_device._device = device
+    write = asyncio.create_task(hid_device._write())
+    await asyncio.sleep(0)
+    await hid_device.stop()
+    future = hid_device.send_msg(HidOutputMessage())
+    await asyncio.wait_for(write, 0.1)
+    device.close.assert_called_once()
+    assert hid_device._device is None
+    assert not future.done()
+
+
+@pytest.mark.asyncio
+async def test_stop_fails_pending_messages(hid_device):
+    future = hid_device.send_msg(HidOutputMessage())
+    await hid_device.stop()
+    with pytest.raises(RuntimeError):
+        await future
+
+
+@pytest.mark.asyncio
+async def test_stop_skips_cancelled_messages(hid_device):
+    cancelled = hid_device.send_msg(HidOutputMessage())
+    cancelled.cancel()
+    pending = hid_device.send_msg(HidOutputMessage())
+    await hid_device.stop()
+    assert cancelled.cancelled()
+    with pytest.raises(RuntimeError):
+        await pending
+
+
+def test_dropped_without_stop_releases_resources(mutenix_state):
+    device = Mock()
+    hid_device = HidDevice(mutenix_state)
+    executor = hid_device._io_executor
+    hid_device._attach_device(device)
+    del hid_device
+    gc.collect()
+    device.close.assert_called_once()
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+
+
 @pytest.mark.asyncio
 async def test_write_failure(hid_device):
     msg = HidOutputMessage()
@@ -149,6 +221,64 @@ async def test_read_value_error(hid_device):
         )
 
 
+@pytest.mark.asyncio
+async def test_read_skipped_while_device_busy(hid_device):
+    hid_device._device = Mock()
+    hid_device.READ_POLL_INTERVAL = 0
+    with hid_device._io_lock:
+        await hid_device._read()
+    hid_device._device.read.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_exclusive_holds_back_writes(hid_device):
+    device = Mock()
+    device.write.return_value = 9
+    hid_device._device = device
+    release = threading.Event()
+
+    def upgrade(raw):
+        assert raw is device
+        assert not hid_device._io_lock.acquire(blocking=False)
+        release.wait(1)
+        return "done"
+
+    exclusive = asyncio.create_task(hid_device.run_exclusive(upgrade))
+    await asyncio.sleep(0)
+    future = hid_device.send_msg(SetLed(1, LedColor.GREEN))
+    write = asyncio.create_task(hid_device._write())
+    await asyncio.sleep(0.01)
+    device.write.assert_not_called()
+    release.set()
+    assert await exclusive == "done"
+    await asyncio.wait_for(write, 1)
+    device.write.assert_called_once()
+    assert await future == 9
+
+
+@pytest.mark.asyncio
+async def test_run_exclusive_without_device(hid_device):
+    func = Mock()
+    with pytest.raises(ValueError, match="Device not connected"):
+        await hid_device.run_exclusive(func)
+    func.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_device_closes_previous_device(hid_device):
+    device = Mock()
+    hid_device._device = device
+    with patch.object(
+        hid_device,
+        "_search_for_device_loop",
+        new_callable=AsyncMock,
+    ) as mock_search:
+        mock_search.return_value = None
+        await hid_device._wait_for_device()
+    device.close.assert_called_once()
+    assert hid_device._device is None
+
+
 class TypeMatcher:
     def __init__(self, expected_type):
         self.expected_type = expected_type
@@ -194,6 +324,16 @@ async def test_ping_waits_before_sending(hid_device):
             mock_sleep.assert_called_with(RoundAboutMatcher(4.5, 0.2))
 
 
+@pytest.mark.asyncio
+async def test_ping_overdue_does_not_sleep_negative(hid_device):
+    hid_device._last_ping_time = asyncio.get_event_loop().time() - 60
+    with patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        with patch.object(hid_device, "send_msg") as mock_send_msg:
+            await hid_device._ping()
+            mock_sleep.assert_called_with(0.0)
+            mock_send_msg.assert_called_once_with(TypeMatcher(Ping))
+
+
 # test
 
 
@@ -210,6 +350,16 @@ async def test_send_report_success(hid_device):
     )
 
 
+@pytest.mark.asyncio
+async def test_send_report_set_led(hid_device):
+    msg = SetLed(1, LedColor.GREEN)
+
+    hid_device._device = Mock()
+    hid_device._device.write.return_value = 9
+    hid_device._send_report(msg)
+    hid_device._device.write.assert_called_once_with(msg.to_report())
+
+
 @pytest.mark.asyncio
 async def test_send_report_failure(hid_device):
     msg = PrepareUpdate()
@@ -52,20 +52,21 @@ def macropad():
     ):
         mock_device = Mock()
         mock_device.connected = True
+        mock_device.stop = AsyncMock()
         MockHidDevice.return_value = mock_device
-        MockWebSocketClient.return_value = Mock()
-        MockVirtualMacropad.return_value = Mock()
+        MockWebSocketClient.return_value = Mock(stop=AsyncMock())
+        MockVirtualMacropad.return_value = Mock(stop=AsyncMock())
         return Macropad(Config())
 
 
 @pytest.mark.asyncio
 async def test_hid_callback_status(macropad):
     msg = Status(bytes([1, 1, 0, 0, 1]))
-    macropad._teams_websocket.send_message = AsyncMock()
+    macropad._teams_websocket.send_message_nowait = Mock()
     await macropad._hid_callback(msg)
-    macropad._teams_websocket.send_message.assert_called_once()
+    macropad._teams_websocket.send_message_nowait.assert_called_once()
     assert (
-        macropad._teams_websocket.send_message.call_args[0][0].action
+        macropad._teams_websocket.send_message_nowait.call_args[0][0].action
         == MeetingAction.ToggleMute
     )
 
@@ -75,10 +76,60 @@ async def test_hid_callback_version_info(macropad):
     msg = VersionInfo(bytes([1, 0, 0, 2]))
     macropad._version_seen = None
     with patch(
-        "mutenix.macropad.check_for_device_update",
-    ) as mock_check_for_device_update:
+        "mutenix.macropad.fetch_device_update",
+        return_value=None,
+    ) as mock_fetch_device_update:
         await macropad._hid_callback(msg)
-        mock_check_for_device_update.assert_called_once_with(ANY, msg, ANY)
+        mock_fetch_device_update.assert_called_once_with(msg, ANY)
+
+
+@pytest.mark.asyncio
+async def test_hid_callback_version_info_performs_update(macropad):
+    msg = VersionInfo(bytes([1, 0, 0, 2]))
+    macropad._version_seen = None
+    with (
+        patch("mutenix.macropad.fetch_device_update", return_value=b"archive"),
+        patch(
+            "mutenix.macropad.extract_update_files",
+            return_value=[("main.py", b"")],
+        ) as mock_extract,
+        patch("mutenix.macropad.perform_hid_upgrade") as mock_upgrade,
+        patch.object(macropad, "_setup_device") as mock_setup_device,
+    ):
+        macropad._device.run_exclusive = AsyncMock(
+            side_effect=lambda func: func(macropad._device.raw),
+        )
+        await macropad._hid_callback(msg)
+        macropad._device.run_exclusive.assert_awaited_once()
+        assert mock_extract.call_args[0][0].read() == b"archive"
+        mock_upgrade.assert_called_once_with(
+            macropad._device.raw,
+            [("main.py", b"")],
+        )
+        mock_setup_device.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_hid_callback_version_info_update_failure_retries(macropad):
+    msg = VersionInfo(bytes([1, 0, 0, 2]))
+    macropad._version_seen = None
+    macropad._update_device_status = AsyncMock()
+    macropad._device.run_exclusive = AsyncMock(
+        side_effect=ValueError("Device not connected"),
+    )
+    with (
+        patch("mutenix.macropad.fetch_device_update", return_value=b"archive"),
+        patch(
+            "mutenix.macropad.extract_update_files",
+            return_value=[("main.py", b"")],
+        ),
+        patch.object(macropad, "_setup_device") as mock_setup_device,
+    ):
+        await macropad._hid_callback(msg)
+        mock_setup_device.assert_not_called()
+    assert macropad._version_seen is None
+    assert macropad._state.hardware.version == msg.version
+    macropad._update_device_status.assert_awaited_once_with(force=True)
 
 
 @pytest.mark.asyncio
@@ -87,21 +138,25 @@ async def test_hid_callback_version_info_only_once(macropad):
     macropad._version_seen = None
     await macropad._hid_callback(msg)
     with patch(
-        "mutenix.macropad.check_for_device_update",
-    ) as mock_check_for_device_update:
+        "mutenix.macropad.fetch_device_update",
+    ) as mock_fetch_device_update:
         await macropad._hid_callback(msg)
-        mock_check_for_device_update.assert_not_called()
+        mock_fetch_device_update.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_teams_callback_token_refresh(macropad):
     msg = ServerMessage(tokenRefresh="new_token")
     macropad._current_state = None
-    with patch("pathlib.Path.open", mock_open()) as mock_file:
+    with (
+        patch("pathlib.Path.open", mock_open()) as mock_file,
+        patch("mutenix.config._write_config_sidecar"),
+    ):
         await macropad._teams_callback(msg)
         mock_file.assert_called_once()
         assert str(mock_file.call_args[0][0]).endswith("w")
-        mock_file().write.assert_any_call("new_token")
+        written = "".join(call.args[0] for call in mock_file().write.call_args_list)
+        assert "teams_token: new_token\n" in written
 
 
 @pytest.mark.asyncio
@@ -110,6 +165,7 @@ async def test_teams_callback_token_refresh_save_failed(macropad):
     macropad._current_state = None
     with (
         patch("pathlib.Path.open", mock_open()) as mock_file,
+        patch("mutenix.config._write_config_sidecar"),
         patch("mutenix.macropad._logger.error"),
     ):
         mock_file().write.side_effect = IOError
@@ -133,15 +189,12 @@ async def test_update_device_status(macropad):
     )
 
     def send_msg(msg):
-        future = asyncio.get_event_loop().create_future()
-        future.set_result(None)
         assert isinstance(msg, SetLed)
-        return future
 
-    macropad._device.send_msg = Mock(side_effect=send_msg)
+    macropad._device.send_msg_nowait = Mock(side_effect=send_msg)
     macropad._virtual_macropad.send_msg = AsyncMock()
     await macropad._update_device_status()
-    assert macropad._device.send_msg.call_count == 8
+    assert macropad._device.send_msg_nowait.call_count == 8
     assert macropad._virtual_macropad.send_msg.call_count == 8
 
 
@@ -160,15 +213,12 @@ async def test_update_device_status_not_in_meeting(macropad):
     )
 
     def send_msg(msg):
-        future = asyncio.get_event_loop().create_future()
-        future.set_result(None)
         assert isinstance(msg, SetLed)
-        return future
 
-    macropad._device.send_msg = Mock(side_effect=send_msg)
+    macropad._device.send_msg_nowait = Mock(side_effect=send_msg)
     macropad._virtual_macropad.send_msg = AsyncMock()
     await macropad._update_device_status()
-    assert macropad._device.send_msg.call_count == 8
+    assert macropad._device.send_msg_nowait.call_count == 8
     assert macropad._virtual_macropad.send_msg.call_count == 8
 
 
@@ -197,18 +247,18 @@ async def test_hid_callback_parametrized(
     should_call,
 ):
     msg = Status(msg_bytes)
-    macropad._teams_websocket.send_message = AsyncMock()
+    macropad._teams_websocket.send_message_nowait = Mock()
 
     await macropad._hid_callback(msg)
     if should_call:
-        macropad._teams_websocket.send_message.assert_called_once()
+        macropad._teams_websocket.send_message_nowait.assert_called_once()
         if expected_action:
             assert (
-                macropad._teams_websocket.send_message.call_args[0][0].action.name
+                macropad._teams_websocket.send_message_nowait.call_args[0][0].action.name
                 == expected_action.name
             )
     else:
-        macropad._teams_websocket.send_message.assert_not_called()
+        macropad._teams_websocket.send_message_nowait.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -216,7 +266,7 @@ async def test_hid_callback_invalid_button(macropad):
     msg = Status([11, 1, 0, 0, 1])
 
     await macropad._hid_callback(msg)
-    macropad._teams_websocket.send_message.assert_not_called()
+    macropad._teams_websocket.send_message_nowait.assert_not_called()
 
 
 class IdentifierWithoutToken:
@@ -267,19 +317,19 @@ async def test_setup_without_existing_token():
     ],
 )
 async def test_send_status(macropad, status, expected_action, expected_parameters):
-    macropad._teams_websocket.send_message = AsyncMock()
+    macropad._teams_websocket.send_message_nowait = Mock()
     with patch(
         "mutenix.macropad.bring_teams_to_foreground",
     ) as mock_bring_teams_to_foreground:
         await macropad._send_status(status)
         if expected_action:
-            macropad._teams_websocket.send_message.assert_called_once()
-            client_message = macropad._teams_websocket.send_message.call_args[0][0]
+            macropad._teams_websocket.send_message_nowait.assert_called_once()
+            client_message = macropad._teams_websocket.send_message_nowait.call_args[0][0]
             assert client_message.action == expected_action
             if expected_parameters:
                 assert client_message.parameters == expected_parameters
         else:
-            macropad._teams_websocket.send_message.assert_not_called()
+            macropad._teams_websocket.send_message_nowait.assert_not_called()
             if status.button == 3 and status.triggered and status.released:
                 mock_bring_teams_to_foreground.assert_called_once()
             else:
@@ -303,6 +353,7 @@ async def test_process(macropad):
     macropad._device.process.assert_called_once()
     macropad._teams_websocket.process.assert_called_once()
     macropad._virtual_macropad.process.assert_called_once()
+    macropad._device.stop.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -320,6 +371,9 @@ async def test_process_with_exception(macropad):
     macropad._device.process.assert_called_once()
     macropad._teams_websocket.process.assert_called_once()
     macropad._virtual_macropad.process.assert_called_once()
+    macropad._device.stop.assert_awaited_once()
+    macropad._teams_websocket.stop.assert_awaited_once()
+    macropad._virtual_macropad.stop.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -385,6 +439,16 @@ async def test_stop():
     macropad._virtual_macropad.stop.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_stop_twice_releases_once(macropad):
+    await macropad.stop()
+    await macropad.stop()
+
+    macropad._device.stop.assert_awaited_once()
+    macropad._teams_websocket.stop.assert_awaited_once()
+    macropad._virtual_macropad.stop.assert_awaited_once()
+
+
 @pytest.mark.asyncio
 async def test_update_device_status_teams_source_in_meeting(macropad):
     macropad._config.leds = [
@@ -409,15 +473,51 @@ async def test_update_device_status_teams_source_in_meeting(macropad):
         ),
     )
 
-    macropad._device.send_msg = Mock()
+    macropad._device.send_msg_nowait = Mock()
     macropad._virtual_macropad.send_msg = AsyncMock()
 
     await macropad._update_device_status()
 
-    macropad._device.send_msg.assert_called_once_with(SetLed(1, LedColor.RED))
+    macropad._device.send_msg_nowait.assert_called_once_with(SetLed(1, LedColor.RED))
     macropad._virtual_macropad.send_msg.assert_called_once_with(SetLed(1, LedColor.RED))
 
 
+@pytest.mark.asyncio
+async def test_update_device_status_skips_unchanged_led(macropad):
+    macropad._config.leds = [
+        Mock(
+            button_id=1,
+            teams_state=Mock(
+                teams_state=TeamsState.MUTED,
+                color_on=ConfigLedColor.RED,
+                color_off=ConfigLedColor.GREEN,
+            ),
+        ),
+    ]
+    macropad._current_state = ServerMessage(
+        meetingUpdate=MeetingUpdate(
+            meetingState=MeetingState(
+                isInMeeting=True,
+                isMuted=True,
+                isHandRaised=False,
+                isVideoOn=True,
+            ),
+            meetingPermissions=MeetingPermissions(canLeave=True),
+        ),
+    )
+    macropad._last_led_update[1] = SetLed(1, LedColor.RED)
+    macropad._device.send_msg_nowait = Mock()
+    macropad._virtual_macropad.send_msg = AsyncMock()
+
+    await macropad._update_device_status()
+
+    macropad._device.send_msg_nowait.assert_not_called()
+
+    await macropad._update_device_status(force=True)
+
+    macropad._device.send_msg_nowait.assert_called_once_with(SetLed(1, LedColor.RED))
+
+
 @pytest.mark.asyncio
 async def test_update_device_status_teams_source_not_in_meeting(macropad):
     macropad._config.leds = [
@@ -442,12 +542,12 @@ async def test_update_device_status_teams_source_not_in_meeting(macropad):
         ),
     )
 
-    macropad._device.send_msg = Mock()
+    macropad._device.send_msg_nowait = Mock()
     macropad._virtual_macropad.send_msg = AsyncMock()
 
     await macropad._update_device_status()
 
-    macropad._device.send_msg.assert_called_once_with(SetLed(1, LedColor.BLACK))
+    macropad._device.send_msg_nowait.assert_called_once_with(SetLed(1, LedColor.BLACK))
     macropad._virtual_macropad.send_msg.assert_called_once_with(
         SetLed(1, LedColor.BLACK),
     )
@@ -468,13 +568,13 @@ async def test_update_device_status_cmd_source_with_result(macropad):
         ),
     ]
     macropad._last_status_check = defaultdict(int)
-    macropad._device.send_msg = Mock()
+    macropad._device.send_msg_nowait = Mock()
     macropad._virtual_macropad.send_msg = AsyncMock()
 
     with patch("asyncio.to_thread", return_value=b"blue"):
         await macropad._update_device_status()
 
-    macropad._device.send_msg.assert_called_once_with(SetLed(1, LedColor.BLUE))
+    macropad._device.send_msg_nowait.assert_called_once_with(SetLed(1, LedColor.BLUE))
     macropad._virtual_macropad.send_msg.assert_called_once_with(
         SetLed(1, LedColor.BLUE),
     )
@@ -497,13 +597,13 @@ async def test_update_device_status_cmd_source_without_result(macropad):
         ),
     ]
     macropad._last_status_check = defaultdict(int)
-    macropad._device.send_msg = Mock()
+    macropad._device.send_msg_nowait = Mock()
     macropad._virtual_macropad.send_msg = AsyncMock()
 
     with patch("asyncio.to_thread", return_value=0):
         await macropad._update_device_status()
 
-    macropad._device.send_msg.assert_called_once_with(SetLed(1, LedColor.YELLOW))
+    macropad._device.send_msg_nowait.assert_called_once_with(SetLed(1, LedColor.YELLOW))
     macropad._virtual_macropad.send_msg.assert_called_once_with(
         SetLed(1, LedColor.YELLOW),
     )
@@ -526,12 +626,12 @@ async def test_update_device_status_cmd_source_interval_not_elapsed(macropad):
         ),
     ]
     macropad._last_status_check = defaultdict(lambda: time.time())
-    macropad._device.send_msg = AsyncMock()
+    macropad._device.send_msg_nowait = AsyncMock()
     macropad._virtual_macropad.send_msg = AsyncMock()
 
     await macropad._update_device_status()
 
-    macropad._device.send_msg.assert_not_called()
+    macropad._device.send_msg_nowait.assert_not_called()
     macropad._virtual_macropad.send_msg.assert_not_called()
 
 
@@ -556,28 +656,28 @@ async def test_do_check_status_sleep_called(macropad):
 
 
 def test_activate_serial_console(macropad):
-    macropad._device.send_msg = Mock()
+    macropad._device.send_msg_nowait = Mock()
     macropad.activate_serial_console()
-    macropad._device.send_msg.assert_called_once()
-    sent_message = macropad._device.send_msg.call_args[0][0]
+    macropad._device.send_msg_nowait.assert_called_once()
+    sent_message = macropad._device.send_msg_nowait.call_args[0][0]
     assert sent_message._activate_debug == 2
     assert sent_message._activate_filesystem == 0
 
 
 def test_deactivate_serial_console(macropad):
-    macropad._device.send_msg = Mock()
+    macropad._device.send_msg_nowait = Mock()
     macropad.deactivate_serial_console()
-    macropad._device.send_msg.assert_called_once()
-    sent_message = macropad._device.send_msg.call_args[0][0]
+    macropad._device.send_msg_nowait.assert_called_once()
+    sent_message = macropad._device.send_msg_nowait.call_args[0][0]
     assert sent_message._activate_debug == 1
     assert sent_message._activate_filesystem == 0
 
 
 def test_activate_filesystem(macropad):
-    macropad._device.send_msg = Mock()
+    macropad._device.send_msg_nowait = Mock()
     macropad.activate_filesystem()
-    macropad._device.send_msg.assert_called_once()
-    sent_message = macropad._device.send_msg.call_args[0][0]
+    macropad._device.send_msg_nowait.assert_called_once()
+    sent_message = macropad._device.send_msg_nowait.call_args[0][0]
     assert sent_message._activate_filesystem == 2
 
 
@@ -647,12 +747,12 @@ async def test_update_device_status_webhook_source_with_color(macropad):
         ),
     ]
     macropad._state.led_colors[1] = "red"
-    macropad._device.send_msg = Mock()
+    macropad._device.send_msg_nowait = Mock()
     macropad._virtual_macropad.send_msg = AsyncMock()
 
     await macropad._update_device_status()
 
-    macropad._device.send_msg.assert_called_once_with(SetLed(1, LedColor.RED))
+    macropad._device.send_msg_nowait.assert_called_once_with(SetLed(1, LedColor.RED))
     macropad._virtual_macropad.send_msg.assert_called_once_with(SetLed(1, LedColor.RED))
 
 
@@ -668,12 +768,12 @@ async def test_update_device_status_webhook_source_with_invalid_color(macropad):
         ),
     ]
     macropad._virtual_macropad.get_led_status = Mock(return_value="invalid_color")
-    macropad._device.send_msg = Mock()
+    macropad._device.send_msg_nowait = Mock()
     macropad._virtual_macropad.send_msg = AsyncMock()
 
     await macropad._update_device_status()
 
-    macropad._device.send_msg.assert_called_once_with(SetLed(1, LedColor.BLACK))
+    macropad._device.send_msg_nowait.assert_called_once_with(SetLed(1, LedColor.BLACK))
     macropad._virtual_macropad.send_msg.assert_called_once_with(
         SetLed(1, LedColor.BLACK),
     )
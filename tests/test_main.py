@@ -3,10 +3,13 @@
 from __future__ import annotations
 
 import argparse
+import json
 from pathlib import Path
+from unittest.mock import Mock
 from unittest.mock import patch
 
 import pytest
+from mutenix.__main__ import event_loop_factory
 from mutenix.__main__ import list_devices
 from mutenix.__main__ import main
 from mutenix.__main__ import parse_arguments
@@ -105,7 +108,7 @@ def test_main_with_update_file(
     default_args.update_file = "path/to/update.tar.gz"
 
     with (
-        patch("asyncio.run", autospec=True) as mock_asyncio_run,
+        patch("asyncio.Runner") as mock_runner,
         patch("mutenix.__main__.load_config", autospec=True) as mock_load_config,
     ):
         mock_load_config.return_value = Config()
@@ -113,7 +116,16 @@ def test_main_with_update_file(
 
         mock_check_for_self_update.assert_called_once()
         mock_signal.assert_called_once()
-        mock_asyncio_run.assert_called_once()
+        mock_runner.return_value.__enter__.return_value.run.assert_called_once()
+
+
+def test_main_config_schema(capsys, default_args):
+    default_args.config_schema = True
+    with patch("mutenix.__main__.load_config", autospec=True) as mock_load_config:
+        main(default_args)
+        mock_load_config.assert_not_called()
+    schema = json.loads(capsys.readouterr().out)
+    assert schema["title"] == "Config"
 
 
 def test_main_list_devices(mock_signal, default_args):
@@ -160,3 +172,30 @@ def test_list_devices(capsys):
         assert "5678" in captured.out
         assert "8765" in captured.out
         assert "4321" in captured.out
+
+
+def test_event_loop_factory_uses_uvloop():
+    fake_uvloop = Mock()
+    with (
+        patch.dict("sys.modules", {"uvloop": fake_uvloop}),
+        patch("platform.system", return_value="Linux"),
+    ):
+        assert event_loop_factory() is fake_uvloop.new_event_loop
+    fake_uvloop.install.assert_not_called()
+
+
+def test_event_loop_factory_skipped_on_windows():
+    fake_uvloop = Mock()
+    with (
+        patch.dict("sys.modules", {"uvloop": fake_uvloop}),
+        patch("platform.system", return_value="Windows"),
+    ):
+        assert event_loop_factory() is None
+
+
+def test_event_loop_factory_without_uvloop():
+    with (
+        patch.dict("sys.modules", {"uvloop": None}),
+        patch("platform.system", return_value="Linux"),
+    ):
+        assert event_loop_factory() is None
@@ -2,17 +2,23 @@
 # Copyright (c) 2025 Matthias Bilger matthias@bilger.info
 from __future__ import annotations
 
+import io
+import json
 import os
 import pathlib
+import tarfile
 import unittest
 from unittest.mock import MagicMock
 from unittest.mock import mock_open
 from unittest.mock import patch
 
+import pytest
 import requests
 from mutenix.models.hid_commands import HardwareTypes
+from mutenix.updates import _download_archive
 from mutenix.updates import check_for_device_update
 from mutenix.updates import check_for_self_update
+from mutenix.updates import HOST_RELEASE_URL
 from mutenix.updates import VersionInfo
 from mutenix.updates.chunks import Chunk
 from mutenix.updates.chunks import FileChunk
@@ -21,13 +27,24 @@ from mutenix.updates.chunks import FileEnd
 from mutenix.updates.chunks import FileStart
 from mutenix.updates.constants import MAX_CHUNK_SIZE
 from mutenix.updates.device_messages import ChunkAck
+from mutenix.updates.device_messages import LogMessage
+from mutenix.updates.device_messages import parse_hid_update_message
 from mutenix.updates.device_messages import UpdateError
 from mutenix.updates.device_update import perform_hid_upgrade
+from mutenix.updates.device_update import perform_upgrade_with_file
+from mutenix.updates.device_update import send_hid_command
 from mutenix.updates.device_update import TransferFile
 
 
+@pytest.fixture(autouse=True)
+def release_cache_file(tmp_path):
+    cache_file = tmp_path / "mutenix-release.json"
+    with patch("mutenix.updates._release_cache_file", return_value=cache_file):
+        yield cache_file
+
+
 class TestUpdates(unittest.TestCase):
-    @patch("mutenix.updates.requests.get")
+    @patch("mutenix.updates._session.get")
     @patch("mutenix.updates.semver.compare")
     def test_check_for_device_update_up_to_date(self, mock_compare, mock_get):
         mock_compare.return_value = 0
@@ -41,7 +58,7 @@ class TestUpdates(unittest.TestCase):
 
         mock_get.assert_called_once()
 
-    @patch("mutenix.updates.requests.get")
+    @patch("mutenix.updates._session.get")
     @patch("mutenix.updates.semver.compare")
     @patch("mutenix.updates.device_update.perform_hid_upgrade")
     def test_check_for_device_update_needs_update(
@@ -64,7 +81,7 @@ class TestUpdates(unittest.TestCase):
 
         mock_update_response = MagicMock()
         mock_update_response.status_code = 200
-        mock_update_response.content = b"fake content"
+        mock_update_response.iter_content.return_value = [b"fake content"]
         mock_get.side_effect = [mock_get.return_value, mock_update_response]
 
         device_version = VersionInfo(
@@ -78,7 +95,7 @@ class TestUpdates(unittest.TestCase):
         mock_get.assert_called()
         mock_upgrade.assert_called_once()
 
-    @patch("mutenix.updates.requests.get")
+    @patch("mutenix.updates._session.get")
     def test_check_for_device_update_no_response(self, mock_get):
         mock_get.return_value.status_code = 500
         mock_get.return_value.json.return_value = None
@@ -90,7 +107,7 @@ class TestUpdates(unittest.TestCase):
 
         mock_get.assert_called_once()
 
-    @patch("mutenix.updates.requests.get")
+    @patch("mutenix.updates._session.get")
     @patch("mutenix.updates.semver.compare")
     @patch("mutenix.updates.device_update.perform_hid_upgrade")
     def test_check_for_device_update_needs_update_but_fails(
@@ -128,7 +145,7 @@ class TestUpdates(unittest.TestCase):
         mock_get.assert_called()
         mock_upgrade.assert_not_called()
 
-    @patch("mutenix.updates.requests.get")
+    @patch("mutenix.updates._session.get")
     @patch("mutenix.updates.semver.compare")
     def test_check_for_self_update_up_to_date(self, mock_compare, mock_get):
         mock_compare.return_value = 0
@@ -139,7 +156,7 @@ class TestUpdates(unittest.TestCase):
 
         mock_get.assert_called_once()
 
-    @patch("mutenix.updates.requests.get")
+    @patch("mutenix.updates._session.get")
     def test_check_for_device_update_request_exception(self, mock_get):
         mock_get.side_effect = requests.RequestException("Network error")
         device_version = VersionInfo(
@@ -153,7 +170,7 @@ class TestUpdates(unittest.TestCase):
         mock_get.assert_called_once()
         self.assertIn("Failed to check for device update availability", log.output[0])
 
-    @patch("mutenix.updates.requests.get")
+    @patch("mutenix.updates._session.get")
     @patch("mutenix.updates.semver.compare")
     def test_check_for_self_update_needs_update(self, mock_compare, mock_get):
         mock_compare.return_value = -1
@@ -243,7 +260,7 @@ class TestUpdates(unittest.TestCase):
         ):
             perform_hid_upgrade(mock_device_instance, ["file1.py"])
 
-    @patch("mutenix.updates.requests.get")
+    @patch("mutenix.updates._session.get")
     def test_check_for_self_update_request_error(self, mock_get):
         mock_get.side_effect = requests.RequestException("Network error")
 
@@ -255,7 +272,7 @@ class TestUpdates(unittest.TestCase):
             log.output[0],
         )
 
-    @patch("mutenix.updates.requests.get")
+    @patch("mutenix.updates._session.get")
     def test_check_for_self_update_status_code_error(self, mock_get):
         mock_get.return_value.status_code = 500
 
@@ -268,6 +285,210 @@ class TestUpdates(unittest.TestCase):
         )
 
 
+class TestDownloadArchive(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("mutenix.updates.time.sleep")
+        self.mock_sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _interrupted(*chunks):
+        yield from chunks
+        raise requests.ConnectionError("connection reset")
+
+    @staticmethod
+    def _full(chunks, accept_ranges=True):
+        response = MagicMock(status_code=200, headers={})
+        if accept_ranges:
+            response.headers["Accept-Ranges"] = "bytes"
+        response.iter_content.return_value = chunks
+        return response
+
+    @staticmethod
+    def _partial(chunks, content_range):
+        response = MagicMock(status_code=206, headers={"Content-Range": content_range})
+        response.iter_content.return_value = chunks
+        return response
+
+    @patch("mutenix.updates._session.get")
+    def test_resumes_interrupted_download(self, mock_get):
+        mock_get.side_effect = [
+            self._full(self._interrupted(b"abc")),
+            self._partial([b"def"], "bytes 3-5/6"),
+        ]
+
+        self.assertEqual(_download_archive("http://example.com/fw", {}), b"abcdef")
+        self.assertEqual(
+            mock_get.call_args_list[1].kwargs["headers"],
+            {"Range": "bytes=3-"},
+        )
+        self.mock_sleep.assert_called_once_with(1.0)
+
+    @patch("mutenix.updates._session.get")
+    def test_restarts_when_range_is_ignored(self, mock_get):
+        mock_get.side_effect = [
+            self._full(self._interrupted(b"abc")),
+            self._full([b"abcdef"]),
+        ]
+
+        self.assertEqual(_download_archive("http://example.com/fw", {}), b"abcdef")
+
+    @patch("mutenix.updates._session.get")
+    def test_restart_that_drops_again_uses_remaining_attempt(self, mock_get):
+        mock_get.side_effect = [
+            self._full(self._interrupted(b"abcd")),
+            self._full(self._interrupted(b"ab")),
+            self._partial([b"cdef"], "bytes 2-5/6"),
+        ]
+
+        self.assertEqual(_download_archive("http://example.com/fw", {}), b"abcdef")
+        self.assertEqual(
+            mock_get.call_args_list[2].kwargs["headers"],
+            {"Range": "bytes=2-"},
+        )
+        self.assertEqual(
+            [c.args[0] for c in self.mock_sleep.call_args_list],
+            [1.0, 2.0],
+        )
+
+    @patch("mutenix.updates._session.get")
+    def test_no_range_without_accept_ranges(self, mock_get):
+        mock_get.side_effect = [
+            self._full(self._interrupted(b"abc"), accept_ranges=False),
+            self._full([b"abcdef"], accept_ranges=False),
+        ]
+
+        self.assertEqual(_download_archive("http://example.com/fw", {}), b"abcdef")
+        self.assertEqual(mock_get.call_args_list[1].kwargs["headers"], {})
+
+    @patch("mutenix.updates._session.get")
+    def test_restarts_on_mismatched_content_range(self, mock_get):
+        mock_get.side_effect = [
+            self._full(self._interrupted(b"abc")),
+            self._partial([b"xyz"], "bytes 0-2/6"),
+            self._full([b"abcdef"]),
+        ]
+
+        self.assertEqual(_download_archive("http://example.com/fw", {}), b"abcdef")
+        self.assertEqual(mock_get.call_args_list[2].kwargs["headers"], {})
+
+    @patch("mutenix.updates._session.get")
+    def test_retries_attempt_without_data(self, mock_get):
+        mock_get.side_effect = [
+            requests.ConnectTimeout("timed out"),
+            self._full([b"abcdef"]),
+        ]
+
+        self.assertEqual(_download_archive("http://example.com/fw", {}), b"abcdef")
+        self.mock_sleep.assert_called_once_with(1.0)
+
+    @patch("mutenix.updates._session.get")
+    def test_retries_server_error(self, mock_get):
+        server_error = MagicMock(status_code=503, headers={})
+        server_error.raise_for_status.side_effect = requests.HTTPError("503")
+        mock_get.side_effect = [server_error, self._full([b"abcdef"])]
+
+        self.assertEqual(_download_archive("http://example.com/fw", {}), b"abcdef")
+        server_error.close.assert_called_once()
+
+    @patch("mutenix.updates._session.get")
+    def test_resumes_body_closed_early(self, mock_get):
+        truncated = self._full([b"abc"])
+        truncated.headers["Content-Length"] = "6"
+        mock_get.side_effect = [
+            truncated,
+            self._partial([b"def"], "bytes 3-5/6"),
+        ]
+
+        self.assertEqual(_download_archive("http://example.com/fw", {}), b"abcdef")
+        self.assertEqual(
+            mock_get.call_args_list[1].kwargs["headers"],
+            {"Range": "bytes=3-"},
+        )
+
+    @patch("mutenix.updates._session.get")
+    def test_rejects_truncated_partial_answer(self, mock_get):
+        truncated = self._full([b"abc"])
+        truncated.headers["Content-Length"] = "6"
+        mock_get.side_effect = [
+            truncated,
+            self._partial([b"d"], "bytes 3-5/6"),
+            self._partial([b"ef"], "bytes 4-5/6"),
+        ]
+
+        self.assertEqual(_download_archive("http://example.com/fw", {}), b"abcdef")
+
+    @patch("mutenix.updates._session.get")
+    def test_gives_up_after_all_attempts(self, mock_get):
+        mock_get.side_effect = [
+            self._full(self._interrupted()),
+            self._full(self._interrupted()),
+            self._full(self._interrupted()),
+        ]
+
+        with self.assertRaises(requests.ConnectionError):
+            _download_archive("http://example.com/fw", {})
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(
+            [c.args[0] for c in self.mock_sleep.call_args_list],
+            [1.0, 2.0],
+        )
+
+
+class TestReleaseCache(unittest.TestCase):
+    @pytest.fixture(autouse=True)
+    def _cache_file(self, release_cache_file):
+        self.cache_file = release_cache_file
+
+    @patch("mutenix.updates._session.get")
+    def test_check_for_self_update_unchanged_release_uses_cache(self, mock_get):
+        release = {"tag_name": "v2.0.0", "html_url": "http://example.com"}
+        first = MagicMock(status_code=200, headers={"ETag": '"abc"'})
+        first.json.return_value = release
+        not_modified = MagicMock(status_code=304, headers={})
+        mock_get.side_effect = [first, not_modified]
+
+        with patch("webbrowser.open") as mock_open_browser:
+            check_for_self_update(1, 0, 0)
+            check_for_self_update(1, 0, 0)
+
+        self.assertEqual(
+            mock_get.call_args_list[1].kwargs["headers"],
+            {"If-None-Match": '"abc"'},
+        )
+        not_modified.json.assert_not_called()
+        self.assertEqual(mock_open_browser.call_count, 2)
+
+    @patch("mutenix.updates._session.get")
+    def test_check_for_self_update_stores_etag(self, mock_get):
+        release = {"tag_name": "v1.0.0"}
+        response = MagicMock(status_code=200, headers={"ETag": 'W/"abc"'})
+        response.json.return_value = release
+        mock_get.return_value = response
+
+        check_for_self_update(1, 0, 0)
+
+        self.assertEqual(
+            json.loads(self.cache_file.read_text()),
+            {HOST_RELEASE_URL: {"etag": 'W/"abc"', "release": release}},
+        )
+
+    @patch("mutenix.updates._session.get")
+    def test_check_for_self_update_ignores_corrupt_cache_entry(self, mock_get):
+        self.cache_file.write_text(
+            json.dumps({HOST_RELEASE_URL: ["not", "a", "dict"]}),
+        )
+        response = MagicMock(status_code=200, headers={})
+        response.json.return_value = {"tag_name": "v2.0.0"}
+        mock_get.return_value = response
+
+        with patch("webbrowser.open") as mock_open_browser:
+            check_for_self_update(1, 0, 0)
+
+        self.assertEqual(mock_get.call_args.kwargs["headers"], {})
+        mock_open_browser.assert_not_called()
+
+
 class TestFileChunk(unittest.TestCase):
     def test_file_chunk_packet(self):
         chunk = FileChunk(1, 2, 3, b"content")
@@ -350,6 +571,58 @@ class TestTransferFile(unittest.TestCase):
         self.assertGreaterEqual(transfer_file.size, len(self.file_content))
 
 
+class TestPerformUpgradeWithFile(unittest.TestCase):
+    @staticmethod
+    def _archive(files: dict[str, bytes]) -> io.BytesIO:
+        stream = io.BytesIO()
+        with tarfile.open(fileobj=stream, mode="w:gz") as tar:
+            for name, content in files.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+        stream.seek(0)
+        return stream
+
+    @patch("mutenix.updates.device_update.perform_hid_upgrade")
+    def test_extracts_top_level_firmware_files_in_memory(self, mock_upgrade):
+        archive = self._archive(
+            {
+                "./code.py": b"print(1)",
+                "old.py.delete": b"",
+                ".hidden.py": b"",
+                "lib/module.py": b"",
+                "README.md": b"",
+            },
+        )
+        perform_upgrade_with_file(MagicMock(), archive)
+
+        mock_upgrade.assert_called_once()
+        self.assertEqual(
+            mock_upgrade.call_args[0][1],
+            [("code.py", b"print(1)"), ("old.py.delete", b"")],
+        )
+
+    @patch("python_minifier.minify", side_effect=lambda x, *args, **kwargs: str(x))
+    def test_transfer_file_total_packages(self, mock_minify):
+        for size, expected in ((1, 1), (MAX_CHUNK_SIZE, 1), (MAX_CHUNK_SIZE + 1, 2)):
+            transfer_file = TransferFile(1, "code.py", b"x" * size)
+            self.assertEqual(transfer_file.calculate_total_packages(), expected)
+            self.assertEqual(transfer_file.chunks, expected + 2)
+
+    @patch("python_minifier.minify", side_effect=lambda x, *args, **kwargs: str(x))
+    def test_transfer_file_from_content(self, mock_minify):
+        transfer_file = TransferFile(1, "code.py", b"print(1)")
+        self.assertEqual(transfer_file.filename, "code.py")
+        self.assertEqual(transfer_file.size, len(b"print(1)"))
+
+
+class TestSendHidCommand(unittest.TestCase):
+    def test_send_hid_command_writes_bytes(self):
+        device = MagicMock()
+        send_hid_command(device, 0xE0)
+        device.write.assert_called_once_with(bytes([1, 0xE0] + [0] * 7))
+
+
 class TestPerformHidUpgradeError(unittest.TestCase):
     @patch("mutenix.updates.hid.device")
     @patch("python_minifier.minify", side_effect=lambda x, *args, **kwargs: str(x))
@@ -431,6 +704,13 @@ class TestChunkAck(unittest.TestCase):
         self.assertEqual(str(chunk_ack), "Invalid Request")
         self.assertEqual(str(chunk_ack), "Invalid Request")
 
+    def test_chunk_ack_truncated_is_invalid(self):
+        data = b"AK" + (1).to_bytes(2, "little") + (2).to_bytes(2, "little")
+        chunk_ack = ChunkAck(data)
+        self.assertFalse(chunk_ack.is_valid)
+        self.assertEqual(str(chunk_ack), "Invalid Request")
+        self.assertIsNone(parse_hid_update_message(data))
+
 
 class TestUpdateError(unittest.TestCase):
     def test_update_error_str_valid(self):
@@ -445,3 +725,14 @@ class TestUpdateError(unittest.TestCase):
         self.assertFalse(update_error.is_valid)
         self.assertEqual(str(update_error), "Invalid Request")
         self.assertEqual(str(update_error), "Invalid Request")
+
+
+class TestParseHidUpdateMessage(unittest.TestCase):
+    def test_parse_log_message(self):
+        for identifier, level in ((b"LD", "debug"), (b"LE", "error")):
+            message = parse_hid_update_message(identifier + b"hello\0\0")
+            self.assertIsInstance(message, LogMessage)
+            self.assertEqual(str(message), f"{level}: hello")
+
+    def test_parse_unknown_identifier(self):
+        self.assertIsNone(parse_hid_update_message(b"\xff\xfe\x00"))
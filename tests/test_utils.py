@@ -250,3 +250,20 @@ def test_ensure_process_run_once_lockfile_cleanup(mock_lock_file):
     result = test_func()
     assert result == "Function executed"
     assert not mock_lock_file.exists()
+
+
+def test_find_teams_windows_reuses_recent_lookup():
+    from mutenix.utils import linux
+
+    with (
+        patch.object(linux, "_teams_window_cache", None),
+        patch(
+            "mutenix.utils.linux.subprocess.check_output",
+            return_value=b"123\n456\n",
+        ) as check_output,
+    ):
+        assert linux._find_teams_windows() == ["123", "456"]
+        assert linux._find_teams_windows() == ["123", "456"]
+        check_output.assert_called_once()
+        linux._find_teams_windows(use_cache=False)
+        assert check_output.call_count == 2
@@ -0,0 +1,44 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2025 Matthias Bilger matthias@bilger.info
+import gzip
+from unittest import mock
+
+import pytest
+from aiohttp.test_utils import make_mocked_request
+from mutenix.webserver.helper import Helper
+from mutenix.webserver.virtual_macropad import VirtualMacropadHandler
+
+
+@pytest.fixture
+def macropad_handler():
+    return VirtualMacropadHandler(None)
+
+
+async def test_index_rendered_once(macropad_handler):
+    request = make_mocked_request("GET", "/")
+    with mock.patch.object(
+        Helper,
+        "render_string",
+        return_value="index",
+    ) as mock_render:
+        first = await macropad_handler.handle_index(request)
+        second = await macropad_handler.handle_index(request)
+        mock_render.assert_called_once_with("index.html", request, {})
+    assert first.body == second.body == b"index"
+    assert "Content-Encoding" not in first.headers
+
+
+async def test_popup_gzip(macropad_handler):
+    request = make_mocked_request(
+        "GET",
+        "/popup",
+        headers={"Accept-Encoding": "gzip, deflate"},
+    )
+    with mock.patch.object(
+        Helper,
+        "render_string",
+        return_value="popup",
+    ):
+        response = await macropad_handler.handle_popup(request)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.body) == b"popup"
@@ -31,19 +31,34 @@ async def test_websocket_handler(client, websocket_handler):
     async for msg in ws:
         if msg.type == web.WSMsgType.TEXT:
             data = json.loads(msg.data)
-            assert "button" in data
-            assert "color" in data
+            assert data == [{"button": 1, "color": "red"}]
             break
     await ws.close()
 
 
 async def test_handle_state_request(websocket_handler):
     ws = mock.Mock()
-    ws.send_json = mock.AsyncMock()
+    ws.send_str = mock.AsyncMock()
     websocket_handler._led_status = {1: "red", 2: "blue"}
     await websocket_handler.handle_state_request(ws)
-    ws.send_json.assert_any_await({"button": 1, "color": "red"})
-    ws.send_json.assert_any_await({"button": 2, "color": "blue"})
+    ws.send_str.assert_awaited_once_with(
+        '[{"button":1,"color":"red"},{"button":2,"color":"blue"}]',
+    )
+
+
+async def test_handle_state_request_uses_snapshot(websocket_handler):
+    ws = mock.Mock()
+    ws.send_str = mock.AsyncMock()
+    await websocket_handler.send_msg(SetLed(id=1, led_color=LedColor.RED))
+    await websocket_handler.handle_state_request(ws)
+    websocket_handler._led_status[1] = "blue"
+    await websocket_handler.handle_state_request(ws)
+    assert ws.send_str.await_args_list == [
+        mock.call('[{"button":1,"color":"red"}]'),
+    ] * 2
+    await websocket_handler.send_msg(SetLed(id=1, led_color=LedColor.GREEN))
+    await websocket_handler.handle_state_request(ws)
+    ws.send_str.assert_awaited_with('[{"button":1,"color":"green"}]')
 
 
 async def test_send_msg(websocket_handler):
@@ -52,6 +67,26 @@ async def test_send_msg(websocket_handler):
     assert websocket_handler._led_status[1] == "red"
 
 
+async def test_send_msg_skips_unchanged_color(websocket_handler):
+    websocket_handler._led_status = {1: "red"}
+    with mock.patch.object(websocket_handler, "_send_led_status") as send:
+        await websocket_handler.send_msg(SetLed(id=1, led_color=LedColor.RED))
+        send.assert_not_called()
+        await websocket_handler.send_msg(SetLed(id=1, led_color=LedColor.BLUE))
+        send.assert_called_once_with(1, "blue")
+
+
+async def test_send_msg_broadcasts_once_encoded(websocket_handler):
+    sockets = [mock.Mock(), mock.Mock()]
+    sockets[0].send_str = mock.AsyncMock()
+    sockets[1].send_str = mock.AsyncMock(side_effect=ConnectionResetError)
+    websocket_handler._websockets.update(sockets)
+    await websocket_handler.send_msg(SetLed(id=1, led_color=LedColor.RED))
+    payload = '{"button":1,"color":"red"}'
+    sockets[0].send_str.assert_awaited_once_with(payload)
+    sockets[1].send_str.assert_awaited_once_with(payload)
+
+
 async def test_send_msg_unsupported(websocket_handler):
     msg = HidOutputMessage()
     with pytest.raises(UnsupportedMessageTypeError):
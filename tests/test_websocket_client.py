@@ -11,7 +11,10 @@ import pytest
 import pytest_asyncio
 from mutenix.models.state import State
 from mutenix.models.teams_messages import ClientMessage
+from mutenix.models.teams_messages import ClientMessageParameter
+from mutenix.models.teams_messages import ClientMessageParameterType
 from mutenix.models.teams_messages import MeetingAction
+from mutenix.models.teams_messages import MeetingUpdate
 from mutenix.websocket_client import Identifier
 from mutenix.websocket_client import TeamsWebSocketClient
 
@@ -48,9 +51,28 @@ async def test_connect(websocket_client):
         await websocket_client._connect()
         mock_connect.assert_called_once_with(
             "ws://testserver?protocol-version=2.0.0&manufacturer=TestManufacturer&device=TestDevice&app=TestApp&app-version=1.0.0&token=test_token",
+            compression=None,
         )
 
 
+def test_uri_parameters_are_encoded():
+    client = TeamsWebSocketClient(
+        State().teams,
+        uri="ws://testserver",
+        identifier=Identifier(
+            manufacturer="Test Manufacturer",
+            device="TestDevice",
+            app="TestApp",
+            app_version="1.0.0",
+            token="a&b=c",
+        ),
+    )
+    assert client._uri == (
+        "ws://testserver?protocol-version=2.0.0&manufacturer=Test+Manufacturer"
+        "&device=TestDevice&app=TestApp&app-version=1.0.0&token=a%26b%3Dc"
+    )
+
+
 @pytest.mark.asyncio
 async def test_connect_exception(websocket_client):
     asyncio.get_event_loop().call_later(
@@ -64,6 +86,27 @@ async def test_connect_exception(websocket_client):
     assert websocket_client._connection is None
 
 
+@pytest.mark.asyncio
+async def test_send_message_nowait(websocket_client):
+    with patch.object(websocket_client, "_connection", AsyncMock()) as mock_connection:
+        message = ClientMessage(action=MeetingAction.React, type="wow")
+        websocket_client.send_message_nowait(message)
+        await websocket_client._send()
+        mock_connection.send.assert_called_once_with(
+            message.model_dump_json(by_alias=True),
+        )
+    assert not websocket_client._send_deque
+
+
+@pytest.mark.asyncio
+async def test_stop_wakes_idle_send(websocket_client):
+    task = asyncio.get_event_loop().create_task(websocket_client._send())
+    await asyncio.sleep(0.001)
+    assert not task.done()
+    await websocket_client.stop()
+    await asyncio.wait_for(task, 0.1)
+
+
 @pytest.mark.asyncio
 async def test_send_message(websocket_client):
     with patch.object(websocket_client, "_connection", AsyncMock()) as mock_connection:
@@ -92,6 +135,30 @@ async def test_receive_message(websocket_client):
         callback.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_receive_message_merges_state(websocket_client):
+    with patch.object(websocket_client, "_connection", AsyncMock()) as mock_connection:
+        mock_connection.recv = AsyncMock(
+            side_effect=['{"tokenRefresh": "token"}', '{"errorMsg": "TEST"}'],
+        )
+        await websocket_client._receive()
+        await websocket_client._receive()
+    assert websocket_client._state.state.token_refresh == "token"
+    assert websocket_client._state.state.error_msg == "TEST"
+
+
+@pytest.mark.asyncio
+async def test_receive_message_keeps_nested_models(websocket_client):
+    with patch.object(websocket_client, "_connection", AsyncMock()) as mock_connection:
+        mock_connection.recv = AsyncMock(
+            return_value='{"meetingUpdate": {"meetingState": {"isMuted": true}}}',
+        )
+        await websocket_client._receive()
+    meeting_update = websocket_client._state.state.meeting_update
+    assert isinstance(meeting_update, MeetingUpdate)
+    assert meeting_update.meeting_state.is_muted
+
+
 @pytest.mark.asyncio
 async def test_receive_message_sync_callback(websocket_client):
     with patch.object(websocket_client, "_connection", AsyncMock()) as mock_connection:
@@ -256,3 +323,20 @@ async def test_send_queue_delay(websocket_client):
             await f2
 
         task.cancel()
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        ClientMessage(action=MeetingAction.ToggleMute),
+        ClientMessage.create(action=MeetingAction.LeaveCall),
+        ClientMessage.create(
+            action=MeetingAction.React,
+            parameters=ClientMessageParameter(
+                type_=ClientMessageParameterType.ReactLike,
+            ),
+        ),
+    ],
+)
+def test_client_message_to_json_matches_pydantic(message):
+    assert message.to_json() == message.model_dump_json(by_alias=True)